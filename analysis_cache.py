@@ -0,0 +1,85 @@
+# analysis_cache.py
+"""Bounded LRU cache for PasswordAnalyzer results.
+
+Entries are keyed by an HMAC-SHA256 of the password under a random key
+generated once per process, so plaintext passwords are never kept as keys,
+together with the analyzer's cache_key: its class, common-password list and
+corpus files. Analyzers sharing a cache therefore only see results computed
+under the same rules, and results from rules since replaced are never served
+again; they age out like any other entry.
+"""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_PROCESS_KEY = os.urandom(32)
+
+
+class AnalysisCache:
+    """Thread-safe LRU cache with size and TTL limits and hit/miss/eviction counters"""
+
+    def __init__(self, max_size=1024, ttl=300.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(password, rules):
+        return rules, hmac.new(_PROCESS_KEY, password.encode('utf-8', 'surrogatepass'), hashlib.sha256).digest()
+
+    def get(self, password, rules):
+        """Cached analysis for password under the given rules (an analyzer's cache_key), or None"""
+        key = self._key(password, rules)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, analysis = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return analysis
+
+    def put(self, password, analysis, rules):
+        key = self._key(password, rules)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires, analysis)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,420 @@
+# async_password_checker.py
+"""PasswordService for asyncio applications.
+
+AsyncPasswordService offers PasswordService's methods as coroutines. Database
+work goes through SQLAlchemy's asyncio extension over aiosqlite, so the event
+loop never waits on SQLite. Password analysis, generation and bcrypt hashing
+run in an executor (a thread pool unless one is passed in; bcrypt and numpy
+release the GIL), so one slow hash does not hold up every other coroutine.
+
+Results are the same immutable records and fresh dicts PasswordService
+returns. Tests are always recorded directly: the write-behind recorder's
+flush would block the loop, and async writes already do not. The database
+must exist first (main.py migrate, or database.init_db()).
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, sessionmaker, undefer_group
+
+import config
+from database import create_async_database_engine
+from models import Breach, PasswordTest, User, UserSummary, STRONG_SCORE
+from passphrase import PassphraseGenerator
+from password_analyzer import PasswordAnalyzer
+from password_checker import PAGE_SIZE, STREAM_BATCH
+from password_generator import PasswordGenerator
+from records import BreachRecord, TestRecord, UserRecord
+from user_cache import USER_IDS
+from user_summary import add_to_summary
+
+
+class AsyncPasswordService:
+    """Coroutine counterpart of PasswordService; use one per event loop"""
+
+    def __init__(self, engine=None, executor=None):
+        self.analyzer = PasswordAnalyzer()
+        self.generator = PasswordGenerator()
+        self._passphrases = None
+        self._passphrases_lock = threading.Lock()
+
+        self._own_engine = engine is None
+        self.engine = engine or create_async_database_engine()
+        # Loaded attributes stay readable after commit; expired ones could not lazy-load here
+        self.sessions = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False, future=True)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix='password-service')
+        self.user_ids = USER_IDS
+        # SQLite has one writer at a time: write transactions queue on _writes(), on the loop,
+        # rather than in busy_timeout waits that a congested loop can stretch until they fail
+        self._write_lock = None
+
+    async def close(self):
+        """Dispose of the engine and shut down the executor, where this service created them"""
+        if self._own_engine:
+            await self.engine.dispose()
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def passphrases(self):
+        """Passphrase generator over the configured wordlist, opened on first use"""
+        if self._passphrases is None:
+            with self._passphrases_lock:
+                if self._passphrases is None:
+                    if not config.WORDLIST:
+                        raise ValueError("No passphrase wordlist configured (set PASSWORD_CHECKER_WORDLIST)")
+                    self._passphrases = PassphraseGenerator(config.WORDLIST)
+        return self._passphrases
+
+    def _writes(self):
+        """The write lock, created inside the running loop on first use.
+
+        Before Python 3.10 an asyncio.Lock binds the event loop current when it
+        is made, so one made in __init__ breaks services built outside the loop.
+        """
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
+
+    async def _offload(self, func, *args, **kwargs):
+        """Run CPU-bound work in the executor and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _user_id(self, session, username):
+        """Id of username from the shared cache, queried (and cached) on a miss"""
+        user_id = self.user_ids.get(username)
+        if user_id is None:
+            user_id = await session.scalar(select(User.id).where(User.username == username))
+            if user_id is None:
+                raise ValueError(f"User '{username}' not found")
+            self.user_ids.set(username, user_id)
+        return user_id
+
+    async def _record_test(self, session, user_id, score, is_generated):
+        test = PasswordTest(user_id=user_id, score=score, is_generated=is_generated)
+        async with self._writes():
+            session.add(test)
+            await session.run_sync(add_to_summary, user_id, tests=int(not is_generated),
+                                   generated=int(is_generated), score_sum=score,
+                                   strong=int(score >= STRONG_SCORE))
+            await session.commit()
+        return test
+
+    async def _record_generated(self, session, user_id, scores):
+        async with self._writes():
+            await session.execute(insert(PasswordTest), [
+                {'user_id': user_id, 'score': score, 'is_generated': True} for score in scores
+            ])
+            await session.run_sync(add_to_summary, user_id, generated=len(scores), score_sum=sum(scores),
+                                   strong=sum(score >= STRONG_SCORE for score in scores))
+            await session.commit()
+
+    # User management
+    async def create_user(self, username: str, password: str) -> UserRecord:
+        async with self.sessions() as session:
+            if await session.scalar(select(User.id).where(User.username == username)) is not None:
+                raise ValueError(f"User '{username}' already exists")
+            user = User(username=username)
+            await self._offload(user.set_password, password)
+            async with self._writes():
+                session.add(user)
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()
+                    raise ValueError(f"User '{username}' already exists")
+
+                session.add(Breach(user_id=user.id, breach_name="New User Security Check", severity="Low"))
+                await session.run_sync(add_to_summary, user.id, breaches=1)
+                await session.commit()
+            self.user_ids.set(username, user.id)
+            return UserRecord(user.id, username, 0, 0, 1, 0)
+
+    async def delete_user(self, username: str):
+        """Delete a user with their tests and breaches"""
+        async with self.sessions() as session:
+            user = await session.scalar(select(User).where(User.username == username))
+            if not user:
+                raise ValueError(f"User '{username}' not found")
+            async with self._writes():
+                # The delete cascade loads the user's collections, which needs the sync session
+                await session.run_sync(lambda sync_session: sync_session.delete(user))
+                await session.commit()
+        self.user_ids.invalidate(username)
+
+    async def _find_user(self, session, username):
+        return await session.scalar(
+            select(User).options(undefer_group('stats')).where(User.username == username)
+        )
+
+    async def authenticate_user(self, username: str, password: str):
+        async with self.sessions() as session:
+            user = await self._find_user(session, username)
+        if user and await self._offload(user.check_password, password):
+            return UserRecord.from_user(user)
+        return None
+
+    async def get_user(self, username: str):
+        async with self.sessions() as session:
+            user = await self._find_user(session, username)
+            return UserRecord.from_user(user) if user else None
+
+    async def get_all_users(self):
+        async with self.sessions() as session:
+            users = await session.scalars(select(User).options(undefer_group('stats')))
+            return [UserRecord.from_user(user) for user in users]
+
+    # Password testing
+    def _analyze_with_suggestions(self, password):
+        analysis = self.analyzer.analyze_password(password)
+        return analysis, self.analyzer.get_improvement_suggestions(analysis)
+
+    async def test_password(self, username: str, password: str) -> dict:
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            analysis, suggestions = await self._offload(self._analyze_with_suggestions, password)
+            test = await self._record_test(session, user_id, analysis['score'], is_generated=False)
+            return {
+                'test_id': test.id,
+                'pending_test': None,
+                'analysis': analysis,
+                'breach_count': analysis['breach_count'],
+                'suggestions': suggestions
+            }
+
+    async def get_test_history(self, username: str):
+        async with self.sessions() as session:
+            tests = await session.scalars(await self._test_history_select(session, username))
+            return [TestRecord.with_breaches(test) for test in tests]
+
+    # Password generation
+    def _generate(self, length, use_uppercase, use_digits, use_symbols, words, separator):
+        if words:
+            capitalize = 'first' if use_uppercase else 'none'
+            digits = 1 if use_digits else 0
+            password = self.passphrases.generate(words, separator, capitalize, digits)
+            entropy = self.passphrases.entropy(words, capitalize, digits)
+        else:
+            password = self.generator.generate_password(length, use_uppercase, use_digits, use_symbols)
+            entropy = self.generator.entropy(length, use_uppercase, use_digits, use_symbols)
+        return password, entropy, self.analyzer.analyze_password(password)
+
+    async def generate_password(self, username: str, length=12, use_uppercase=True, use_digits=True,
+                                use_symbols=True, words=None, separator="-"):
+        """Generate and record a password, or a passphrase of `words` words (see PasswordService)"""
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            password, entropy, analysis = await self._offload(
+                self._generate, length, use_uppercase, use_digits, use_symbols, words, separator
+            )
+            test = await self._record_test(session, user_id, analysis['score'], is_generated=True)
+            return {
+                'password': password,
+                'analysis': analysis,
+                'entropy': entropy,
+                'test_id': test.id,
+                'pending_test': None
+            }
+
+    async def record_generated_passwords(self, username: str, passwords):
+        """Score and store a batch of generated passwords in one transaction"""
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            analyses = await self._offload(self.analyzer.analyze_many, passwords)
+            scores = analyses['score'].tolist()
+            await self._record_generated(session, user_id, scores)
+            return len(scores)
+
+    def _generate_many(self, count, length):
+        entropy = self.generator.entropy(length)
+        return [
+            {'password': password, 'analysis': self.analyzer.analyze_password(password), 'entropy': entropy}
+            for password in self.generator.generate_bulk(count, length)
+        ]
+
+    async def generate_multiple_passwords(self, username: str, count=5, length=12):
+        """Generate and record count passwords with one bulk insert (results have no test_id)"""
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            results = await self._offload(self._generate_many, count, length)
+            await self._record_generated(session, user_id, [result['analysis']['score'] for result in results])
+            return results
+
+    async def get_generation_history(self, username: str):
+        async with self.sessions() as session:
+            tests = await session.scalars(await self._generation_history_select(session, username))
+            return [TestRecord.from_test(test) for test in tests]
+
+    # Breach management
+    async def create_breach(self, username: str, breach_name: str, breach_date, severity: str,
+                            description: str = None):
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            breach = Breach(user_id=user_id, breach_name=breach_name, severity=severity)
+            async with self._writes():
+                session.add(breach)
+                await session.run_sync(add_to_summary, user_id, breaches=1)
+                await session.commit()
+            return BreachRecord(breach.id, user_id, breach_name, severity, ())
+
+    async def get_user_breaches(self, username: str):
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            breaches = await session.scalars(self._breaches_select().where(Breach.user_id == user_id))
+            return [BreachRecord.from_breach(breach) for breach in breaches]
+
+    async def associate_password_with_breach(self, breach_id: int, password_test_id: int):
+        async with self.sessions() as session:
+            breach = await session.scalar(self._breaches_select().where(Breach.id == breach_id))
+            password_test = await session.get(PasswordTest, password_test_id)
+
+            if not breach:
+                raise ValueError(f"Breach {breach_id} not found")
+            if not password_test:
+                raise ValueError(f"Password test {password_test_id} not found")
+
+            async with self._writes():
+                breach.add_affected_password(password_test)
+                await session.commit()
+            return BreachRecord.from_breach(breach)
+
+    async def get_breach_affected_passwords(self, breach_id: int):
+        async with self.sessions() as session:
+            breach = await session.scalar(self._breaches_select().where(Breach.id == breach_id))
+            if not breach:
+                raise ValueError(f"Breach {breach_id} not found")
+            return [TestRecord.from_test(test) for test in breach.affected_passwords]
+
+    # Statistics and analytics
+    async def get_user_stats(self, username: str):
+        async with self.sessions() as session:
+            user_id = await self._user_id(session, username)
+            summary = await session.get(UserSummary, user_id) or UserSummary(
+                test_count=0, generated_count=0, score_sum=0, strong_count=0, breach_count=0
+            )
+            return {
+                'username': username,
+                'tests_performed': summary.test_count,
+                'passwords_generated': summary.generated_count,
+                'average_score': round(summary.average_score, 2),
+                'strong_passwords': summary.strong_count,
+                'breach_count': summary.breach_count,
+                'total_breaches': summary.breach_count
+            }
+
+    async def get_system_overview(self, weak_threshold=40):
+        """System-wide counts for the overview dashboard, in one aggregate query"""
+        def total(column):
+            return select(func.coalesce(func.sum(column), 0)).scalar_subquery()
+
+        async with self.sessions() as session:
+            users, tests, generated, breaches, weak_tests = (await session.execute(select(
+                select(func.count(User.id)).scalar_subquery(),
+                total(UserSummary.test_count),
+                total(UserSummary.generated_count),
+                total(UserSummary.breach_count),
+                select(func.count(PasswordTest.id)).where(PasswordTest.score < weak_threshold).scalar_subquery()
+            ))).one()
+            return {
+                'users': users,
+                'tests': tests,
+                'generated': generated,
+                'weak_tests': weak_tests,
+                'breaches': breaches
+            }
+
+    async def get_weak_tests(self, threshold=40):
+        async with self.sessions() as session:
+            tests = await session.scalars(self._weak_tests_select(threshold))
+            return [TestRecord.from_test(test) for test in tests]
+
+    async def get_all_breaches(self):
+        async with self.sessions() as session:
+            return [BreachRecord.from_breach(breach) for breach in await session.scalars(self._breaches_select())]
+
+    # Paginated and streaming listings, keyset-paginated on id as in PasswordService
+    async def _page(self, statement, to_record, after_id, limit):
+        model = statement.column_descriptions[0]['entity']
+        if after_id is not None:
+            statement = statement.where(model.id > after_id)
+        async with self.sessions() as session:
+            rows = await session.scalars(statement.order_by(model.id).limit(limit))
+            return [to_record(row) for row in rows]
+
+    async def _stream(self, statement, to_record, batch_size):
+        model = statement.column_descriptions[0]['entity']
+        async with self.sessions() as session:
+            result = await session.stream_scalars(
+                statement.order_by(model.id).execution_options(yield_per=batch_size)
+            )
+            async for row in result:
+                yield to_record(row)
+
+    async def _test_history_select(self, session, username):
+        user_id = await self._user_id(session, username)
+        return select(PasswordTest).options(selectinload(PasswordTest.breaches)).where(
+            PasswordTest.user_id == user_id
+        )
+
+    async def _generation_history_select(self, session, username):
+        user_id = await self._user_id(session, username)
+        return select(PasswordTest).where(PasswordTest.user_id == user_id, PasswordTest.is_generated == True)
+
+    def _weak_tests_select(self, threshold):
+        return select(PasswordTest).where(PasswordTest.score < threshold)
+
+    def _breaches_select(self):
+        return select(Breach).options(selectinload(Breach.affected_passwords))
+
+    async def _user_select(self, build_select, username):
+        async with self.sessions() as session:
+            return await build_select(session, username)
+
+    async def get_test_history_page(self, username: str, after_id=None, limit=PAGE_SIZE):
+        statement = await self._user_select(self._test_history_select, username)
+        return await self._page(statement, TestRecord.with_breaches, after_id, limit)
+
+    async def iter_test_history(self, username: str, batch_size=STREAM_BATCH):
+        statement = await self._user_select(self._test_history_select, username)
+        async for record in self._stream(statement, TestRecord.with_breaches, batch_size):
+            yield record
+
+    async def get_generation_history_page(self, username: str, after_id=None, limit=PAGE_SIZE):
+        statement = await self._user_select(self._generation_history_select, username)
+        return await self._page(statement, TestRecord.from_test, after_id, limit)
+
+    async def iter_generation_history(self, username: str, batch_size=STREAM_BATCH):
+        statement = await self._user_select(self._generation_history_select, username)
+        async for record in self._stream(statement, TestRecord.from_test, batch_size):
+            yield record
+
+    async def get_weak_tests_page(self, threshold=40, after_id=None, limit=PAGE_SIZE):
+        return await self._page(self._weak_tests_select(threshold), TestRecord.from_test, after_id, limit)
+
+    def iter_weak_tests(self, threshold=40, batch_size=STREAM_BATCH):
+        return self._stream(self._weak_tests_select(threshold), TestRecord.from_test, batch_size)
+
+    async def get_users_page(self, after_id=None, limit=PAGE_SIZE):
+        return await self._page(select(User).options(undefer_group('stats')), UserRecord.from_user, after_id, limit)
+
+    def iter_users(self, batch_size=STREAM_BATCH):
+        return self._stream(select(User).options(undefer_group('stats')), UserRecord.from_user, batch_size)
+
+    async def get_breaches_page(self, after_id=None, limit=PAGE_SIZE):
+        return await self._page(self._breaches_select(), BreachRecord.from_breach, after_id, limit)
+
+    def iter_breaches(self, batch_size=STREAM_BATCH):
+        return self._stream(self._breaches_select(), BreachRecord.from_breach, batch_size)
@@ -0,0 +1,113 @@
+# audit.py
+"""Bulk password auditing: stream a password file through a process pool.
+
+Input is read lazily in chunks; each chunk is scored with
+PasswordAnalyzer.analyze_many and formatted in a worker process, and the
+formatted chunks are written back in input order. At most a few chunks per
+worker are in flight, so memory stays bounded whatever the input size.
+"""
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from password_analyzer import PasswordAnalyzer
+
+FIELDS = ['line', 'score', 'strength', 'length', 'has_lower', 'has_upper',
+          'has_digit', 'has_symbol', 'breach_count']
+FORMATS = ('jsonl', 'csv')
+
+# json.dumps per row dominates the audit cost, so JSONL rows use a fixed template
+JSON_ROW = ('{"line": %d, "score": %d, "strength": "%s", "length": %d, "has_lower": %s, '
+            '"has_upper": %s, "has_digit": %s, "has_symbol": %s, "breach_count": %d')
+JSON_BOOL = {False: 'false', True: 'true'}
+DEFAULT_CHUNK_SIZE = 20000
+CHUNKS_PER_WORKER = 2
+
+_analyzer = None
+
+
+def _init_worker():
+    """Build one analyzer per process (corpus indexes are memory-mapped, so this is cheap)"""
+    global _analyzer
+    _analyzer = PasswordAnalyzer()
+
+
+def _audit_chunk(first_line, passwords, fmt, include_password):
+    """Score one chunk and return it formatted as text"""
+    columns = _analyzer.analyze_many(passwords)
+    rows = zip(
+        range(first_line, first_line + len(passwords)),
+        *(columns[field].tolist() for field in FIELDS[1:]),
+        *([passwords] if include_password else [])
+    )
+
+    out = io.StringIO()
+    if fmt == 'csv':
+        csv.writer(out, lineterminator='\n').writerows(rows)
+    else:
+        flag = JSON_BOOL
+        for row in rows:
+            line, score, strength, length, lower, upper, digit, symbol, breaches = row[:9]
+            out.write(JSON_ROW % (line, score, strength, length,
+                                  flag[lower], flag[upper], flag[digit], flag[symbol], breaches))
+            if include_password:
+                out.write(', "password": ' + json.dumps(row[9]))
+            out.write('}\n')
+    return out.getvalue()
+
+
+def read_passwords(stream):
+    """Yield one password per line, keeping everything but the line ending"""
+    for line in stream:
+        yield line.rstrip('\r\n')
+
+
+def write_header(out, fmt, include_password):
+    if fmt == 'csv':
+        fields = FIELDS + ['password'] if include_password else FIELDS
+        csv.writer(out, lineterminator='\n').writerow(fields)
+
+
+def audit_stream(passwords, out, fmt='jsonl', workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 include_password=False):
+    """Audit an iterable of passwords, writing results to out in input order.
+
+    Returns the number of passwords audited. workers=1 scores in-process.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    workers = workers or os.cpu_count() or 1
+    passwords = iter(passwords)
+    write_header(out, fmt, include_password)
+
+    def chunks():
+        line = 1
+        while True:
+            chunk = list(islice(passwords, chunk_size))
+            if not chunk:
+                return
+            yield line, chunk
+            line += len(chunk)
+
+    total = 0
+    if workers == 1:
+        _init_worker()
+        for first_line, chunk in chunks():
+            out.write(_audit_chunk(first_line, chunk, fmt, include_password))
+            total += len(chunk)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for first_line, chunk in chunks():
+            pending.append(pool.submit(_audit_chunk, first_line, chunk, fmt, include_password))
+            total += len(chunk)
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    return total
@@ -0,0 +1,165 @@
+# benchmarks/bench_analyzer.py
+"""Per-call latency of PasswordAnalyzer against the original regex chain.
+
+The "triples only" column is the scanner before keyboard-walk, reversed and
+leetspeak detection were added; the "patterns" column is what those cost per
+call, and "scan only" the same for PasswordScanner.scan alone. The run fails
+if scan is more than SCAN_MARGIN slower than that scanner at any length.
+
+Run from the project root:
+    python -m benchmarks.bench_analyzer
+"""
+import random
+import re
+import string
+import timeit
+
+from password_analyzer import PasswordAnalyzer
+from password_scanner import PasswordScanner, PasswordSignals, LOWER, UPPER, DIGIT, SYMBOL, NONALPHA
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*()_+-=[]{}|;:,.<>?"
+LENGTHS = (8, 16, 64)
+
+# Allowed slowdown of scan against the triples-only scanner, best of several runs
+SCAN_MARGIN = 0.2
+
+
+class RegexChainAnalyzer(PasswordAnalyzer):
+    """The analyzer as it was before PasswordScanner: one re.search per rule"""
+
+    def analyze_password(self, password):
+        signals = PasswordSignals(
+            length=len(password),
+            has_lower=bool(re.search(r'[a-z]', password)),
+            has_upper=bool(re.search(r'[A-Z]', password)),
+            has_digit=bool(re.search(r'\d', password)),
+            has_symbol=bool(re.search(r'[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]', password)),
+            repeats=bool(re.search(r'(.)\1{2,}', password)),
+            sequential_numbers=bool(re.search(r'(012|123|234|345|456|567|678|789|890)', password)),
+            sequential_letters=bool(re.search(r'(abc|bcd|cde|def|efg|fgh|ghi|hij|ijk|jkl|klm|lmn|mno|nop|opq|pqr|qrs|rst|stu|tuv|uvw|vwx|wxy|xyz)', password.lower())),
+            keyboard_walk=False,
+            all_alpha=password.lower().isalpha(),
+            lowered=password.lower()
+        )
+        return self.score_signals(signals)
+
+
+class TriplesScanner(PasswordScanner):
+    """The scanner before pattern tables: ascending triples tracked by expected key (ASCII only)"""
+
+    def __init__(self):
+        self.table = {}
+        for code in range(128):
+            ch = chr(code)
+            bits, key = 0, -1
+            if ch in string.ascii_lowercase:
+                bits, key = LOWER, 10 + ord(ch) - ord('a')
+            elif ch in string.ascii_uppercase:
+                bits, key = UPPER, 10 + ord(ch) - ord('A')
+            elif ch in string.digits:
+                bits, key = DIGIT, ord(ch) - ord('0')
+            elif ch in "!@#$%^&*()_+-=[]{}|;:,.<>?":
+                bits = SYMBOL
+            if not ch.isalpha():
+                bits |= NONALPHA
+            successor = {-1: -2, 9: 0, 35: -2}.get(key, key + 1)
+            self.table[ch] = (bits, key, successor)
+
+    def scan(self, password):
+        table = self.table
+        mask = 0
+        repeats = sequential_numbers = sequential_letters = False
+        prev = prev2 = None
+        expected = -2
+        chain = may_start = False
+
+        for ch in password:
+            bits, key, successor = table[ch]
+            mask |= bits
+            if ch == prev and ch == prev2 and ch != '\n':
+                repeats = True
+            if key == expected:
+                if chain:
+                    if key < 10:
+                        sequential_numbers = True
+                    else:
+                        sequential_letters = True
+                chain = may_start
+            else:
+                chain = False
+            expected = successor
+            may_start = key != 9
+            prev2 = prev
+            prev = ch
+
+        return PasswordSignals(
+            length=len(password),
+            has_lower=bool(mask & LOWER),
+            has_upper=bool(mask & UPPER),
+            has_digit=bool(mask & DIGIT),
+            has_symbol=bool(mask & SYMBOL),
+            repeats=repeats,
+            sequential_numbers=sequential_numbers,
+            sequential_letters=sequential_letters,
+            keyboard_walk=False,
+            all_alpha=bool(password) and not mask & NONALPHA,
+            lowered=password.lower()
+        )
+
+
+def sample_passwords(length, count=200, seed=42):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(length)) for _ in range(count)]
+
+
+def per_call_us(analyzer, passwords, repeat=5):
+    """Best-of-N mean latency of analyze_password in microseconds"""
+    number = max(1, 20000 // len(passwords))
+    runs = timeit.repeat(
+        lambda: [analyzer.analyze_password(p) for p in passwords],
+        number=number, repeat=repeat
+    )
+    return min(runs) / (number * len(passwords)) * 1e6
+
+
+def per_scan_us(scanners, passwords, repeat=9):
+    """Best-of-N mean latency of each scanner's scan alone in microseconds.
+
+    The scanners take turns run by run, so a slow stretch of the machine
+    hits them alike.
+    """
+    number = max(1, 20000 // len(passwords))
+    best = [float('inf')] * len(scanners)
+    for _ in range(repeat):
+        for i, scanner in enumerate(scanners):
+            run = timeit.timeit(lambda: [scanner.scan(p) for p in passwords], number=number)
+            best[i] = min(best[i], run)
+    return [run / (number * len(passwords)) * 1e6 for run in best]
+
+
+def main():
+    baseline = RegexChainAnalyzer()
+    triples = PasswordAnalyzer()
+    triples.scanner = TriplesScanner()
+    analyzer = PasswordAnalyzer()
+
+    print(f"{'length':>6}  {'regex chain':>12}  {'triples only':>12}  {'scanner':>10}  "
+          f"{'speedup':>7}  {'patterns':>8}  {'scan only':>9}")
+    for length in LENGTHS:
+        passwords = sample_passwords(length)
+        for password in passwords:
+            assert triples.analyze_password(password) == baseline.analyze_password(password)
+        before = per_call_us(baseline, passwords)
+        previous = per_call_us(triples, passwords)
+        after = per_call_us(analyzer, passwords)
+        scan_previous, scan_after = per_scan_us([triples.scanner, analyzer.scanner], passwords)
+        print(f"{length:>6}  {before:>10.2f}us  {previous:>10.2f}us  {after:>8.2f}us  "
+              f"{before / after:>6.1f}x  {(after - previous) / previous:>+7.0%}  "
+              f"{(scan_after - scan_previous) / scan_previous:>+8.0%}")
+        assert scan_after <= scan_previous * (1 + SCAN_MARGIN), (
+            f"scan at {length} characters is {scan_after:.2f}us, more than {SCAN_MARGIN:.0%} "
+            f"over the triples-only scanner's {scan_previous:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_async.py
+"""Many concurrent coroutine requests against AsyncPasswordService, next to
+the same requests made by calling the synchronous PasswordService from
+coroutines. A heartbeat task ticking every millisecond measures how late the
+event loop runs; a blocked loop shows up as lag spikes.
+
+The mix includes logins, so bcrypt runs too. Runs against a throwaway
+database in a temporary directory. Run from the project root:
+    python -m benchmarks.bench_async [requests] [concurrency]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+PASSWORDS = ["password123", "Tr0ub4dor&3", "correct horse battery staple", "qwerty!2024",
+             "N0t-S0-Ea5y?", "letmein", "Summer2024!", "zX8#kLp2$wQ9"]
+
+# Share of requests per kind
+MIX = [('test_password', 0.45), ('generate_password', 0.25), ('get_user_stats', 0.25),
+       ('authenticate_user', 0.05)]
+
+TICK = 0.001
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0
+
+
+async def heartbeat(lags, stop):
+    """Sleep TICK at a time, recording how much later than that each wake-up comes"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(loop.time() - start - TICK)
+
+
+async def drive(call, usernames, requests, concurrency):
+    """Latencies of requests mixed calls, at most concurrency in flight; plus loop lags and wall time"""
+    kinds, weights = zip(*MIX)
+    rng = random.Random(7)
+    plan = [(rng.choices(kinds, weights)[0], rng.choice(usernames), rng.choice(PASSWORDS)) for _ in range(requests)]
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    # Connections, compiled statements and the executor's threads are set up before measuring
+    for kind, _ in MIX:
+        await call(kind, usernames[0], PASSWORDS[0])
+    await asyncio.gather(*(call('test_password', username, PASSWORDS[1]) for username in usernames))
+
+    async def request(kind, username, password):
+        async with limit:
+            start = time.perf_counter()
+            await call(kind, username, password)
+            latencies.append(time.perf_counter() - start)
+
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(request(*item) for item in plan))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return latencies, lags, elapsed
+
+
+def main():
+    args = sys.argv[1:]
+    requests = int(args[0]) if args else 400
+    concurrency = int(args[1]) if len(args) > 1 else 100
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_async_'))
+    import utils
+    from async_password_checker import AsyncPasswordService
+    from database import init_db
+    from password_checker import PasswordService
+
+    utils.LOADING_PAUSE = 0
+    init_db()
+    sync_service = PasswordService()
+    usernames = [f"user{i}" for i in range(8)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for username in usernames:
+            sync_service.create_user(username, 'bench-password')
+
+    async def call_sync(kind, username, password):
+        if kind == 'authenticate_user':
+            sync_service.authenticate_user(username, 'bench-password')
+        elif kind == 'test_password':
+            sync_service.test_password(username, password)
+        else:
+            getattr(sync_service, kind)(username)
+
+    async def run_async():
+        async with AsyncPasswordService() as service:
+            async def call(kind, username, password):
+                if kind == 'authenticate_user':
+                    await service.authenticate_user(username, 'bench-password')
+                elif kind == 'test_password':
+                    await service.test_password(username, password)
+                else:
+                    await getattr(service, kind)(username)
+
+            return await drive(call, usernames, requests, concurrency)
+
+    print(f"{requests} requests, up to {concurrency} in flight")
+    print(f"{'service':<24}  {'req/s':>7}  {'p50 req':>9}  {'p99 req':>9}  {'p99 lag':>9}  {'max lag':>9}")
+    # Off the main thread, so the synchronous service skips its loading spinners as it would in a server
+    blocking = []
+    thread = threading.Thread(target=lambda: blocking.append(asyncio.run(
+        drive(call_sync, usernames, requests, concurrency)
+    )))
+    thread.start()
+    thread.join()
+    for name, (latencies, lags, elapsed) in [('PasswordService (sync)', blocking[0]),
+                                             ('AsyncPasswordService', asyncio.run(run_async()))]:
+        print(f"{name:<24}  {requests / elapsed:>7,.0f}  {1000 * percentile(latencies, 0.5):>7.1f}ms"
+              f"  {1000 * percentile(latencies, 0.99):>7.1f}ms  {1000 * percentile(lags, 0.99):>7.1f}ms"
+              f"  {1000 * max(lags, default=0):>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_audit.py
+"""Bulk-audit throughput as the worker count grows.
+
+Run from the project root:
+    python -m benchmarks.bench_audit [passwords]
+"""
+import io
+import os
+import random
+import string
+import sys
+import time
+
+from audit import audit_stream
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*()_+-=[]{}|;:,.<>?"
+
+
+def sample_passwords(count, seed=7):
+    rng = random.Random(seed)
+    return [''.join(rng.choices(ALPHABET, k=rng.randint(6, 20))) for _ in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    passwords = sample_passwords(count)
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cores // 2 or 1, cores})
+
+    print(f"{count:,} passwords, {cores} CPU(s)")
+    print(f"{'workers':>7}  {'seconds':>8}  {'records/sec':>12}  {'scaling':>7}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        audit_stream(passwords, io.StringIO(), 'jsonl', workers)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>7}  {elapsed:>8.2f}  {rate:>12,.0f}  {rate / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_concurrency.py
+"""One PasswordService shared by N threads running a mix of password tests,
+generations and stats reads: throughput and p50/p99 latency per call, then a
+consistency check that every recorded test reached the database and the
+user_summary counters still match the base tables.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_concurrency [seconds] [threads ...]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+PASSWORDS = ["password123", "Tr0ub4dor&3", "correct horse battery staple", "qwerty!2024",
+             "N0t-S0-Ea5y?", "letmein", "Summer2024!", "zX8#kLp2$wQ9"]
+
+# Share of calls per kind
+MIX = [('test_password', 0.5), ('generate_password', 0.3), ('get_user_stats', 0.2)]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0
+
+
+def run(service, usernames, threads, seconds):
+    """Latencies per call kind and error count from threads calling for seconds"""
+    calls = {
+        'test_password': lambda rng: service.test_password(rng.choice(usernames), rng.choice(PASSWORDS)),
+        'generate_password': lambda rng: service.generate_password(rng.choice(usernames), 16),
+        'get_user_stats': lambda rng: service.get_user_stats(rng.choice(usernames)),
+    }
+    kinds, weights = zip(*MIX)
+    latencies = defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        mine = defaultdict(list)
+        start_gate.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            start = time.perf_counter()
+            try:
+                calls[kind](rng)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            mine[kind].append(time.perf_counter() - start)
+        with lock:
+            for kind, values in mine.items():
+                latencies[kind].extend(values)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, errors
+
+
+def main():
+    args = sys.argv[1:]
+    seconds = float(args[0]) if args else 3
+    thread_counts = [int(arg) for arg in args[1:]] or [1, 2, 4, 8, 16]
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_concurrency_'))
+    import utils
+    from sqlalchemy import func
+    from database import SessionLocal, init_db
+    from models import PasswordTest
+    from password_checker import PasswordService
+    from user_summary import verify_summary
+
+    utils.LOADING_PAUSE = 0
+    init_db()
+    service = PasswordService()
+    usernames = [f"user{i}" for i in range(8)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for username in usernames:
+            service.create_user(username, 'bench-password')
+
+    recorded = 0
+    print(f"{'threads':>7}  {'calls/s':>8}  " + "  ".join(f"{kind + ' p50/p99 ms':>30}" for kind, _ in MIX)
+          + f"  {'errors':>6}")
+    for threads in thread_counts:
+        latencies, errors = run(service, usernames, threads, seconds)
+        total = sum(len(values) for values in latencies.values())
+        recorded += len(latencies['test_password']) + len(latencies['generate_password'])
+        columns = "  ".join(
+            f"{1000 * percentile(latencies[kind], 0.5):>20.2f} / {1000 * percentile(latencies[kind], 0.99):>7.2f}"
+            for kind, _ in MIX
+        )
+        print(f"{threads:>7}  {total / seconds:>8,.0f}  {columns}  {len(errors):>6}")
+        for error in errors[:3]:
+            print(f"    {type(error).__name__}: {error}")
+
+    service.flush()
+    session = SessionLocal()
+    try:
+        stored = session.query(func.count(PasswordTest.id)).scalar()
+        drift = verify_summary(session)
+    finally:
+        session.close()
+    print(f"recorded {recorded:,} tests, {stored:,} in the database, {len(drift)} summary differences")
+    assert stored == recorded and not drift
+
+
+if __name__ == '__main__':
+    main()
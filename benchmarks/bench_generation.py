@@ -0,0 +1,54 @@
+# benchmarks/bench_generation.py
+"""Generate-and-record wall time: one generate_password call per option
+versus a single generate_multiple_passwords batch.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_generation [max count] [--no-pause]
+
+--no-pause drops the spinner's closing pause so only the database and
+generation work is timed.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+
+def timed(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    max_count = int(args[0]) if args else 20
+    counts = [count for count in (1, 5, 20, 100, 500) if count <= max_count] or [max_count]
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    workdir = tempfile.mkdtemp(prefix='bench_generation_')
+    os.chdir(workdir)
+    import utils
+    from database import init_db
+    from password_checker import PasswordService
+
+    if '--no-pause' in sys.argv:
+        utils.LOADING_PAUSE = 0
+    init_db()
+    service = PasswordService()
+    timed(service.create_user, 'bench', 'bench-password')
+
+    print(f"spinner pause {utils.LOADING_PAUSE}s, database in {workdir}")
+    print(f"{'count':>6}  {'per item':>9}  {'batch':>8}  {'speedup':>7}  {'batch ms/password':>17}")
+    for count in counts:
+        loop = timed(lambda: [service.generate_password('bench', 16) for _ in range(count)])
+        batch = timed(service.generate_multiple_passwords, 'bench', count, 16)
+        print(f"{count:>6}  {loop:>8.3f}s  {batch:>7.3f}s  {loop / batch:>6.1f}x  {1000 * batch / count:>17.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_indexes.py
+"""Filtered reads on a database from before the secondary indexes, then the
+same reads after migrations.py upgrades it. Asserts with EXPLAIN QUERY PLAN
+that every filtered read searches its index instead of scanning the table.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_indexes [tests] [users]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Index each read is expected to search once migrated
+EXPECTED_INDEXES = {
+    'test history': 'ix_password_tests_user_generated',
+    'generation history': 'ix_password_tests_user_generated',
+    'weak tests': 'ix_password_tests_score',
+    'user breaches': 'ix_breaches_user_id',
+    'breaches of tests': 'ix_breach_password_association_password_test_id',
+}
+
+
+def literal_sql(session, statement):
+    return str(statement.compile(session.get_bind(), compile_kwargs={'literal_binds': True}))
+
+
+def query_plan(session, sql):
+    from sqlalchemy import text
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def time_reads(session, reads, rounds=5):
+    """Seconds per execution of each read's SQL, rows fetched but no ORM objects built"""
+    from sqlalchemy import text
+    timings = {}
+    for name, sql in reads.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            session.execute(text(sql)).all()
+        timings[name] = (time.perf_counter() - start) / rounds
+    return timings
+
+
+def main():
+    args = sys.argv[1:]
+    tests = int(args[0]) if args else 300000
+    users = int(args[1]) if len(args) > 1 else 100
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_indexes_'))
+    from sqlalchemy import insert, select, text
+    from database import Base, SessionLocal, engine, init_db
+    from migrations import LATEST_VERSION, migrate
+    from models import Breach, PasswordTest, User, breach_password_association
+    from password_checker import PasswordService
+
+    # The schema as it was before migration 1: tables only, no secondary indexes
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(text(f"DROP INDEX {index.name}"))
+        connection.execute(text("PRAGMA user_version = 0"))
+
+    rng = random.Random(7)
+    session = SessionLocal()
+    session.execute(insert(User), [{'username': f"user{i}", 'password_hash': '-'} for i in range(users)])
+    session.execute(insert(PasswordTest), [
+        {'user_id': rng.randint(1, users), 'score': rng.randint(0, 100), 'is_generated': rng.random() < 0.3}
+        for _ in range(tests)
+    ])
+    session.execute(insert(Breach), [
+        {'user_id': user_id, 'breach_name': f"breach {user_id}.{i}", 'severity': 'Low'}
+        for user_id in range(1, users + 1) for i in range(5)
+    ])
+    session.execute(insert(breach_password_association), [
+        {'breach_id': breach_id, 'password_test_id': test_id}
+        for breach_id in range(1, 5 * users + 1) for test_id in rng.sample(range(1, tests + 1), 20)
+    ])
+    session.commit()
+
+    service = PasswordService()
+    statements = {
+        'test history': service._test_history_query(session, 'user1').statement,
+        'generation history': service._generation_history_query(session, 'user1').statement,
+        'weak tests': service._weak_tests_query(session, 5).statement,
+        'user breaches': select(Breach).where(Breach.user_id == 1),
+        'breaches of tests': select(breach_password_association).where(
+            breach_password_association.c.password_test_id.in_(range(1, 500))
+        ),
+    }
+    reads = {name: literal_sql(session, statement) for name, statement in statements.items()}
+    before = time_reads(session, reads)
+    session.close()
+
+    init_db()  # create_all is a no-op here; the migration adds the indexes
+    assert migrate(engine) == [], "init_db should have applied every migration"
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA user_version")).scalar() == LATEST_VERSION
+
+    session = SessionLocal()
+    after = time_reads(session, reads)
+    print(f"{tests:,} tests over {users} users")
+    print(f"{'read':<20}  {'before':>9}  {'after':>9}  plan")
+    unindexed = []
+    for name, sql in reads.items():
+        plan = query_plan(session, sql)
+        print(f"{name:<20}  {1000 * before[name]:>7.2f}ms  {1000 * after[name]:>7.2f}ms  {'; '.join(plan)}")
+        if not any(EXPECTED_INDEXES[name] in step for step in plan):
+            unindexed.append(name)
+    session.close()
+    assert not unindexed, f"not using their index: {', '.join(unindexed)}"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_query_budget.py
+"""Statements and rows fetched per PasswordService read, checked against a
+budget that grows linearly with the data, so an eager load that multiplies
+collections together (tests x breaches) fails loudly.
+
+Seeds one user with a long history and many breaches, each breach affecting
+a slice of the tests. Runs against a throwaway database in a temporary
+directory. Run from the project root:
+    python -m benchmarks.bench_query_budget [tests] [breaches]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.query_counter import StatementCounter
+
+IN_BATCH = 500  # parent ids per selectin query (SQLAlchemy's default)
+
+
+def batches(count):
+    return max(1, -(-count // IN_BATCH))
+
+
+def cartesian_rows(session, username):
+    """The old eager load of both User collections, for comparison"""
+    from sqlalchemy.orm import joinedload
+    from models import User
+    session.query(User).options(
+        joinedload(User.password_tests),
+        joinedload(User.breaches)
+    ).filter(User.username == username).first()
+
+
+def main():
+    args = sys.argv[1:]
+    tests = int(args[0]) if args else 10000
+    breaches = int(args[1]) if len(args) > 1 else 50
+    affected = max(1, tests // breaches) * 2  # tests per breach, overlapping the next breach's slice
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_query_budget_'))
+    from sqlalchemy import insert
+    from database import SessionLocal, engine, init_db
+    from models import Breach, PasswordTest, User, breach_password_association
+    from password_checker import PAGE_SIZE, PasswordService
+    from user_summary import rebuild_summary
+
+    init_db()
+    session = SessionLocal()
+    user = User(username='bench', password_hash='-')
+    session.add(user)
+    session.flush()
+    session.execute(insert(PasswordTest), [
+        {'user_id': user.id, 'score': i % 100, 'is_generated': i % 3 == 0} for i in range(tests)
+    ])
+    session.execute(insert(Breach), [
+        {'user_id': user.id, 'breach_name': f"breach {i}", 'severity': 'Low'} for i in range(breaches)
+    ])
+    test_ids = [test_id for (test_id,) in session.query(PasswordTest.id).order_by(PasswordTest.id)]
+    breach_ids = [breach_id for (breach_id,) in session.query(Breach.id).order_by(Breach.id)]
+    links = {
+        (breach_id, test_ids[(i * affected // 2 + j) % tests])
+        for i, breach_id in enumerate(breach_ids) for j in range(affected)
+    }
+    session.execute(insert(breach_password_association), [
+        {'breach_id': breach_id, 'password_test_id': test_id} for breach_id, test_id in links
+    ])
+    session.commit()
+    rebuild_summary(session)  # the rows above bypassed the service
+    session.close()
+
+    generated = sum(1 for i in range(tests) if i % 3 == 0)
+    weak = sum(1 for i in range(tests) if i % 100 < 40)
+    per_breach = max(1, len(links) // breaches)
+    lookup = 1  # the username -> id query, run cold before every call
+    service = PasswordService()
+    # name: (call, statement budget, row budget)
+    calls = {
+        'get_test_history': (lambda: service.get_test_history('bench'),
+                             lookup + 1 + batches(tests), lookup + tests + len(links)),
+        'get_test_history_page': (lambda: service.get_test_history_page('bench'),
+                                  lookup + 2, lookup + PAGE_SIZE + PAGE_SIZE * breaches),
+        'get_generation_history': (lambda: service.get_generation_history('bench'),
+                                   lookup + 1, lookup + generated),
+        'get_weak_tests': (lambda: service.get_weak_tests(), 1, weak),
+        'get_user_breaches': (lambda: service.get_user_breaches('bench'),
+                              lookup + 1 + batches(breaches), lookup + breaches + len(links)),
+        'get_all_breaches': (lambda: service.get_all_breaches(),
+                             1 + batches(breaches), breaches + len(links)),
+        'get_breach_affected_passwords': (lambda: service.get_breach_affected_passwords(breach_ids[0]),
+                                          2, 1 + 2 * per_breach),
+        'get_all_users': (lambda: service.get_all_users(), 1, 1),
+        'get_user_stats': (lambda: service.get_user_stats('bench'), lookup + 1, lookup + 1),
+        'get_system_overview': (lambda: service.get_system_overview(), 1, 1),
+    }
+
+    counter = StatementCounter(engine, count_rows=True)
+    print(f"{tests:,} tests, {breaches} breaches, {len(links):,} breach links")
+    print(f"{'call':<30}  {'statements':>10}  {'budget':>6}  {'rows':>8}  {'budget':>8}")
+    over = []
+    for name, (call, statement_budget, row_budget) in calls.items():
+        service.user_ids.invalidate()
+        with counter.measure() as result:
+            call()
+        print(f"{name:<30}  {result['statements']:>10}  {statement_budget:>6}"
+              f"  {result['rows']:>8,}  {row_budget:>8,}")
+        if result['statements'] > statement_budget or result['rows'] > row_budget:
+            over.append(name)
+
+    session = SessionLocal()
+    with counter.measure() as result:
+        cartesian_rows(session, 'bench')
+    session.close()
+    print(f"{'(joinedload tests + breaches)':<30}  {result['statements']:>10}  {'':>6}  {result['rows']:>8,}")
+    assert not over, f"over budget: {', '.join(over)}"
+
+
+if __name__ == '__main__':
+    main()
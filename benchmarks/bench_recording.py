@@ -0,0 +1,60 @@
+# benchmarks/bench_recording.py
+"""PasswordTest insert throughput: one commit per row versus write-behind
+group commits.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_recording [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_recording_'))
+    from database import SessionLocal, init_db
+    from models import User
+    from password_checker import PasswordService
+    from write_behind import WriteBehindRecorder
+
+    init_db()
+    session = SessionLocal()
+    user = User(username='bench', password_hash='-')
+    session.add(user)
+    session.commit()
+    user_id = user.id
+    session.close()
+
+    print(f"{'mode':<28}  {'rows':>7}  {'seconds':>8}  {'rows/sec':>10}")
+
+    # Synchronous: one session and commit per row, as test_password does by default
+    service = PasswordService()
+    sync_rows = max(1, rows // 50)
+    start = time.perf_counter()
+    for i in range(sync_rows):
+        session = SessionLocal()
+        service._record_test(session, user_id, i % 100, False)
+        session.close()
+    elapsed = time.perf_counter() - start
+    print(f"{'commit per row':<28}  {sync_rows:>7,}  {elapsed:>8.2f}  {sync_rows / elapsed:>10,.0f}")
+
+    for max_batch in (100, 1000, 5000):
+        recorder = WriteBehindRecorder(max_batch=max_batch)
+        start = time.perf_counter()
+        for i in range(rows):
+            recorder.record(user_id, i % 100, False)
+        recorder.flush()
+        elapsed = time.perf_counter() - start
+        recorder.close()
+        label = f"write-behind, batch {max_batch}"
+        print(f"{label:<28}  {rows:>7,}  {elapsed:>8.2f}  {rows / elapsed:>10,.0f}  "
+              f"({recorder.batches} commits)")
+
+
+if __name__ == '__main__':
+    main()
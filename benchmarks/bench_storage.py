@@ -0,0 +1,137 @@
+# benchmarks/bench_storage.py
+"""Concurrent read/write load under each storage profile, and under the
+engine as it was before profiles (default pysqlite settings, no pool).
+
+Writer processes record one test per transaction the way PasswordService
+does (the row plus its user_summary update); reader processes fetch a page
+of history and the user's summary. Each profile gets a fresh database file
+in a temporary directory. Run from the project root:
+    python -m benchmarks.bench_storage [seconds] [writers] [readers]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASELINE = 'before'
+
+
+def make_engine(url, profile):
+    if profile == BASELINE:
+        from sqlalchemy import create_engine
+        return create_engine(url, future=True)
+    from database import create_database_engine
+    return create_database_engine(url, profile)
+
+
+def worker(url, profile, role, users, seconds, results):
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from models import PasswordTest, UserSummary
+    from user_summary import add_to_summary
+
+    engine = make_engine(url, profile)
+    Session = sessionmaker(bind=engine, future=True)
+    rng = random.Random(os.getpid())
+    done = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, users)
+        start = time.perf_counter()
+        session = Session()
+        try:
+            if role == 'write':
+                score = rng.randint(0, 100)
+                session.add(PasswordTest(user_id=user_id, score=score, is_generated=False))
+                add_to_summary(session, user_id, tests=1, score_sum=score, strong=int(score >= 60))
+                session.commit()
+            else:
+                session.query(PasswordTest).filter(PasswordTest.user_id == user_id).order_by(
+                    PasswordTest.id.desc()
+                ).limit(20).all()
+                session.get(UserSummary, user_id)
+            done += 1
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            session.rollback()
+            errors += 1
+        finally:
+            session.close()
+    engine.dispose()
+    results.put((role, done, errors, latencies))
+
+
+def run_profile(profile, seconds, writers, readers, users=50, seed_tests=50000):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+    from database import Base
+    from migrations import migrate
+    from models import PasswordTest, User
+    from user_summary import rebuild_summary
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_storage_'), 'bench.db')}"
+    engine = make_engine(url, profile)
+    Base.metadata.create_all(bind=engine)
+    migrate(engine)
+    with Session(engine, future=True) as session:
+        session.execute(insert(User), [{'username': f"user{i}", 'password_hash': '-'} for i in range(users)])
+        rng = random.Random(7)
+        session.execute(insert(PasswordTest), [
+            {'user_id': rng.randint(1, users), 'score': rng.randint(0, 100), 'is_generated': False}
+            for _ in range(seed_tests)
+        ])
+        session.commit()
+        rebuild_summary(session)
+    engine.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(url, profile, role, users, seconds, results))
+        for role in ['write'] * writers + ['read'] * readers
+    ]
+    for process in processes:
+        process.start()
+    totals = {'write': [0, 0, []], 'read': [0, 0, []]}
+    for _ in processes:
+        role, done, errors, latencies = results.get()
+        totals[role][0] += done
+        totals[role][1] += errors
+        totals[role][2].extend(latencies)
+    for process in processes:
+        process.join()
+    return totals
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    args = sys.argv[1:]
+    seconds = float(args[0]) if args else 5
+    writers = int(args[1]) if len(args) > 1 else 2
+    readers = int(args[2]) if len(args) > 2 else 4
+
+    # Workers import database, whose default engine points at the working directory
+    os.chdir(tempfile.mkdtemp(prefix='bench_storage_'))
+    from database import STORAGE_PROFILES
+
+    print(f"{writers} writer and {readers} reader processes, {seconds:g}s per profile")
+    print(f"{'profile':<12}  {'writes/s':>9}  {'p99 write':>9}  {'reads/s':>9}  {'p99 read':>9}  {'locked':>6}")
+    for profile in [BASELINE, *STORAGE_PROFILES]:
+        totals = run_profile(profile, seconds, writers, readers)
+        writes, write_errors, write_latencies = totals['write']
+        reads, read_errors, read_latencies = totals['read']
+        print(f"{profile:<12}  {writes / seconds:>9,.0f}  {1000 * percentile(write_latencies, 0.99):>7.1f}ms"
+              f"  {reads / seconds:>9,.0f}  {1000 * percentile(read_latencies, 0.99):>7.1f}ms"
+              f"  {write_errors + read_errors:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_user_lookup.py
+"""SQL statements per PasswordService call with a cold and a warm
+username -> user id cache, asserting the warm call saves the user lookup.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_user_lookup
+"""
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.query_counter import StatementCounter
+
+
+def main():
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_user_lookup_'))
+    import utils
+    from database import SessionLocal, engine, init_db
+    from password_checker import PasswordService
+
+    utils.LOADING_PAUSE = 0
+    init_db()
+    service = PasswordService()
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.create_user('bench', 'bench-password')
+
+    calls = {
+        'test_password': lambda: service.test_password('bench', 'Tr0ub4dor&3'),
+        'get_test_history': lambda: service.get_test_history('bench'),
+        'generate_password': lambda: service.generate_password('bench', 16),
+        'create_breach': lambda: service.create_breach('bench', 'Example', datetime.now(), 'Low'),
+        'get_user_breaches': lambda: service.get_user_breaches('bench'),
+        'get_generation_history': lambda: service.get_generation_history('bench'),
+    }
+    counter = StatementCounter(engine)
+    print(f"{'call':<24}  {'cold':>4}  {'warm':>4}")
+    for name, call in calls.items():
+        counts = []
+        for warm in (False, True):
+            if not warm:
+                service.user_ids.invalidate()
+            with counter.measure() as result, contextlib.redirect_stdout(io.StringIO()):
+                call()
+            counts.append(result['statements'])
+        print(f"{name:<24}  {counts[0]:>4}  {counts[1]:>4}")
+        assert counts[1] == counts[0] - 1, f"{name}: the warm call should skip exactly the user lookup"
+
+    rounds = 2000
+    session = SessionLocal()
+    for warm in (False, True):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            if not warm:
+                service.user_ids.invalidate()
+            service._user_id(session, 'bench')
+        elapsed = time.perf_counter() - start
+        print(f"user id lookup, {'warm' if warm else 'cold'}: {1e6 * elapsed / rounds:8.1f} us")
+    session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_user_stats.py
+"""get_user_stats latency and peak Python memory for a user with a long
+history: the user_summary row versus loading every row and counting in
+Python.
+
+Runs against a throwaway database in a temporary directory. Run from the
+project root:
+    python -m benchmarks.bench_user_stats [tests] [--skip-legacy]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def legacy_stats(session, username):
+    """get_user_stats as it was: eager-load both collections, count in Python"""
+    from sqlalchemy.orm import joinedload
+    from models import User
+    user = session.query(User).options(
+        joinedload(User.password_tests),
+        joinedload(User.breaches)
+    ).filter(User.username == username).first()
+    tests = user.password_tests
+    return {
+        'username': user.username,
+        'tests_performed': len([t for t in tests if not t.is_generated]),
+        'passwords_generated': len([t for t in tests if t.is_generated]),
+        'average_score': round(sum(t.score for t in tests) / len(tests) if tests else 0, 2),
+        'strong_passwords': len([t for t in tests if t.score >= 60]),
+        'breach_count': len(user.breaches),
+        'total_breaches': len(user.breaches)
+    }
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    tests = int(args[0]) if args else 1000000
+
+    # The database URL is relative, so a temporary working directory gives a fresh database
+    os.chdir(tempfile.mkdtemp(prefix='bench_user_stats_'))
+    from sqlalchemy import insert
+    from database import SessionLocal, init_db
+    from models import Breach, PasswordTest, User
+    from password_checker import PasswordService
+    from user_summary import rebuild_summary
+
+    init_db()
+    session = SessionLocal()
+    user = User(username='bench', password_hash='-')
+    session.add(user)
+    session.flush()
+    rng = random.Random(7)
+    session.execute(insert(PasswordTest), [
+        {'user_id': user.id, 'score': rng.randint(0, 100), 'is_generated': rng.random() < 0.3}
+        for _ in range(tests)
+    ])
+    session.add_all(Breach(user_id=user.id, breach_name=f"breach {i}", severity="Low") for i in range(5))
+    session.commit()
+    rebuild_summary(session)  # the rows above bypassed the service
+    session.close()
+
+    service = PasswordService()
+    service.get_user_stats('bench')  # warm the user id cache and SQLite's page cache
+    print(f"{tests:,} tests")
+    stats, elapsed, peak = measure(lambda: service.get_user_stats('bench'))
+    print(f"{'summary row':<16}  {1000 * elapsed:>9.1f} ms  {peak / 1024:>10,.0f} KiB peak")
+    if '--skip-legacy' not in sys.argv:
+        session = SessionLocal()
+        legacy, elapsed, peak = measure(lambda: legacy_stats(session, 'bench'))
+        session.close()
+        print(f"{'load and count':<16}  {1000 * elapsed:>9.1f} ms  {peak / 1024:>10,.0f} KiB peak")
+        assert legacy == stats, (legacy, stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# benchmarks/query_counter.py
+"""Counting of the SQL statements (and optionally the rows they return) sent
+through an engine, shared by the benchmarks that assert query counts.
+"""
+import contextlib
+
+
+class StatementCounter:
+    """Counts statements sent to the database while active.
+
+    With count_rows, each SELECT is also re-run as SELECT count(*) on the same
+    connection to count the rows it returns, so timings taken while counting
+    rows are meaningless.
+    """
+
+    def __init__(self, engine, count_rows=False):
+        from sqlalchemy import event
+        self.count = 0
+        self.rows = 0
+        self.count_rows = count_rows
+        event.listen(engine, 'after_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        if self.count_rows and statement.lstrip().upper().startswith('SELECT'):
+            counter = conn.connection.cursor()
+            try:
+                counter.execute(f"SELECT count(*) FROM ({statement})", parameters)
+                self.rows += counter.fetchone()[0]
+            finally:
+                counter.close()
+
+    @contextlib.contextmanager
+    def measure(self):
+        start, start_rows = self.count, self.rows
+        result = {}
+        yield result
+        result['statements'] = self.count - start
+        result['rows'] = self.rows - start_rows
@@ -0,0 +1,191 @@
+# breach_index.py
+"""Offline breached-password lookup built from a "SHA1:count" dump.
+
+The dump (for example the Have I Been Pwned "ordered by hash" download) is
+converted once by build_breach_index() into a single file that is split into
+2^20 partitions by the first five hex characters of the SHA-1, the same
+prefix the HIBP range API uses. A fixed offset table gives each partition's
+record range in constant time, so a lookup reads one table entry and one
+small, sorted run of records from the memory-mapped file.
+
+Each record keeps 64 bits of the hash after the first three bytes plus the
+breach count, so a partition holds a few hundred 12-byte records even for
+dumps of a billion lines.
+
+File layout (little-endian):
+    header    magic, record count
+    offsets   (2^20 + 1) x uint64 record indices, one per prefix plus an end marker
+    records   record count x (uint64 hash key, uint32 count), sorted by prefix then key
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b'PWBIDX01'
+HEADER = struct.Struct('<8sQ')
+PREFIX_BITS = 20
+PREFIXES = 1 << PREFIX_BITS
+OFFSET = struct.Struct('<QQ')
+RECORD_DTYPE = np.dtype([('key', '<u8'), ('count', '<u4')])
+SPILL_DTYPE = np.dtype([('prefix', '<u4'), ('key', '<u8'), ('count', '<u4')])
+READ_HINT = 64 * 1024 * 1024
+
+HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+HEX_VALUES[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+HEX_VALUES[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+HEX_VALUES[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+
+def _split_digests(digests):
+    """Partition prefix and 64-bit key for an (n, 20) uint8 array of SHA-1 digests"""
+    prefix = (
+        (digests[:, 0].astype(np.uint32) << 12)
+        | (digests[:, 1].astype(np.uint32) << 4)
+        | (digests[:, 2].astype(np.uint32) >> 4)
+    )
+    key = np.ascontiguousarray(digests[:, 3:11]).view('>u8').ravel().astype('<u8')
+    return prefix, key
+
+
+def _parse_lines(lines):
+    """Parse "SHA1:count" lines into prefix, key and count arrays"""
+    lines = [line for line in lines if line[40:41] == b':']
+    nibbles = HEX_VALUES[np.frombuffer(b''.join(line[:40] for line in lines), dtype=np.uint8)]
+    nibbles = nibbles.reshape(len(lines), 40)
+    valid = (nibbles < 16).all(axis=1)
+    digests = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    counts = np.array([line[41:].strip() or b'0' for line in lines], dtype='S20')
+    prefix, key = _split_digests(digests[valid])
+    return prefix, key, counts[valid].astype(np.uint32)
+
+
+def build_breach_index(dump_path, index_path):
+    """Build an index file from a SHA1:count dump and return the record count.
+
+    Lines are spilled to 256 temporary files by their first hash byte, then
+    each spill is sorted on its own, so memory use is bounded by the largest
+    spill (about 1/256 of the dump) whatever order the dump is in.
+    """
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    with tempfile.TemporaryDirectory(dir=index_dir) as spill_dir:
+        spills = {}
+        try:
+            with open(dump_path, 'rb') as dump:
+                while True:
+                    lines = dump.readlines(READ_HINT)
+                    if not lines:
+                        break
+                    prefix, key, count = _parse_lines(lines)
+                    records = np.empty(len(prefix), dtype=SPILL_DTYPE)
+                    records['prefix'], records['key'], records['count'] = prefix, key, count
+                    records = records[np.argsort(prefix >> 12, kind='stable')]
+                    buckets = records['prefix'] >> 12
+                    bounds = np.searchsorted(buckets, np.arange(257))
+                    for bucket in np.flatnonzero(np.diff(bounds)):
+                        if bucket not in spills:
+                            spills[bucket] = open(os.path.join(spill_dir, f'{bucket:02x}'), 'wb')
+                        records[bounds[bucket]:bounds[bucket + 1]].tofile(spills[bucket])
+        finally:
+            for spill in spills.values():
+                spill.close()
+
+        per_prefix = np.zeros(PREFIXES, dtype=np.uint64)
+        total = 0
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, 0))
+            out.write(bytes(8 * (PREFIXES + 1)))
+            for bucket in sorted(spills):
+                records = np.fromfile(os.path.join(spill_dir, f'{bucket:02x}'), dtype=SPILL_DTYPE)
+                records = records[np.lexsort((records['key'], records['prefix']))]
+                per_prefix += np.bincount(records['prefix'], minlength=PREFIXES).astype(np.uint64)
+                packed = np.empty(len(records), dtype=RECORD_DTYPE)
+                packed['key'], packed['count'] = records['key'], records['count']
+                packed.tofile(out)
+                total += len(records)
+
+            offsets = np.zeros(PREFIXES + 1, dtype='<u8')
+            offsets[1:] = np.cumsum(per_prefix)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, total))
+            out.write(offsets.tobytes())
+        os.replace(tmp_path, index_path)
+    return total
+
+
+class BreachIndex:
+    """Read-only view of an index file built by build_breach_index"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # The file this index was opened from, as part of PasswordAnalyzer.cache_key
+            self.identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a breach index")
+
+        self._offsets = np.frombuffer(self._mmap, dtype='<u8', count=PREFIXES + 1, offset=HEADER.size)
+        records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=self.count,
+                                offset=HEADER.size + 8 * (PREFIXES + 1))
+        self._keys = records['key']
+        self._counts = records['count']
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, password):
+        """Number of times the password appears in the dump (0 if never)"""
+        return self.lookup_digest(hashlib.sha1(password.encode('utf-8')).digest())
+
+    def lookup_digest(self, digest):
+        """lookup for a password whose SHA-1 digest is already known"""
+        prefix = (digest[0] << 12) | (digest[1] << 4) | (digest[2] >> 4)
+        start, end = OFFSET.unpack_from(self._mmap, HEADER.size + 8 * prefix)
+        if start == end:
+            return 0
+        key = int.from_bytes(digest[3:11], 'big')
+        i = start + int(self._keys[start:end].searchsorted(np.uint64(key)))
+        if i < end and int(self._keys[i]) == key:
+            return int(self._counts[i])
+        return 0
+
+    def lookup_many(self, passwords):
+        """Vector form of lookup: a uint32 array of breach counts"""
+        passwords = list(passwords)
+        found = np.zeros(len(passwords), dtype=np.uint32)
+        if not passwords or not self.count:
+            return found
+        digests = b''.join(hashlib.sha1(p.encode('utf-8')).digest() for p in passwords)
+        prefix, key = _split_digests(np.frombuffer(digests, dtype=np.uint8).reshape(len(passwords), 20))
+
+        # Binary search every row inside its own partition at once
+        lo = self._offsets[prefix].astype(np.int64)
+        end = self._offsets[prefix + 1].astype(np.int64)
+        hi = end.copy()
+        last = self.count - 1
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) >> 1
+            right = active & (self._keys[np.minimum(mid, last)] < key)
+            lo = np.where(right, mid + 1, lo)
+            hi = np.where(active & ~right, mid, hi)
+
+        i = np.minimum(lo, last)
+        hit = (lo < end) & (self._keys[i] == key)
+        found[hit] = self._counts[i[hit]]
+        return found
+
+    def close(self):
+        self._offsets = self._keys = self._counts = None
+        self._mmap.close()
@@ -1,5 +1,5 @@
 # cli.py
-from password_checker import PasswordService
+from password_checker import PasswordService, PAGE_SIZE
 from database import init_db
 from ascii_art import show_welcome_banner, show_strength_meter
 from colors import Colors
@@ -26,7 +26,8 @@ class InteractiveCLI:
                 "Test a Password", "View Test History", "Find Weak Passwords", "Back to Main Menu"
             ]),
             "generate": ("Password Generation", [
-                "Generate Single Password", "Generate Multiple Options", "View Generation History", "Back to Main Menu"
+                "Generate Single Password", "Generate Multiple Options", "Generate Passphrase",
+                "View Generation History", "Back to Main Menu"
             ]),
             "breach": ("Breach Management", [
                 "Report New Breach", "View My Breaches", "Associate Password with Breach", "Back to Main Menu"
@@ -65,6 +66,30 @@ class InteractiveCLI:
         value = input(f"{Colors.CYAN}{prompt}: {Colors.RESET}") or default
         return value if value else None
 
+    def show_pages(self, fetch_page, show, title, empty_message=None):
+        """Print rows one page at a time, asking before each further page.
+        
+        fetch_page(after_id) returns the page after that row id (None for the
+        first). Returns the number of rows shown.
+        """
+        after_id = None
+        shown = 0
+        while True:
+            rows = fetch_page(after_id)
+            if not rows:
+                break
+            if not shown:
+                print(title)
+            for row in rows:
+                show(row)
+            shown += len(rows)
+            after_id = rows[-1].id
+            if len(rows) < PAGE_SIZE or input(f"{Colors.CYAN}Enter for more, q to stop: {Colors.RESET}").lower() == 'q':
+                break
+        if not shown and empty_message:
+            print(Colors.warning(empty_message))
+        return shown
+
     def init_database(self):
         loader = ASCIILoader("Initializing database")
         loader.start()
@@ -146,6 +171,8 @@ class InteractiveCLI:
             print(f"Score: {score_color}{analysis['score']}/100 - {analysis['strength']}{Colors.RESET}")
             print(f"Strength Meter: {show_strength_meter(analysis['score'])}")
             print(f"Length: {analysis['length']} | Lower: {analysis['has_lower']} | Upper: {analysis['has_upper']} | Digits: {analysis['has_digit']} | Symbols: {analysis['has_symbol']}")
+            if result['breach_count']:
+                print(Colors.error(f"Found {result['breach_count']:,} times in known data breaches"))
             
             if analysis['feedback']:
                 print(f"\nFeedback: {', '.join(analysis['feedback'])}")
@@ -179,6 +206,32 @@ class InteractiveCLI:
         except ValueError as e:
             self.handle_error(e)
 
+    def generate_passphrase(self):
+        if not self.current_user:
+            print(Colors.error("Please login first"))
+            return
+        
+        words = int(self.get_input("Number of words (default 6)", "6"))
+        separator = input(f"{Colors.CYAN}Separator (default -): {Colors.RESET}") or "-"
+        capitalize = self.get_input("Capitalise words? (y/n, default y)", "y").lower() != 'n'
+        add_digit = self.get_input("Insert a digit? (y/n, default y)", "y").lower() != 'n'
+        
+        try:
+            result = self.service.generate_password(
+                self.current_user.username, use_uppercase=capitalize, use_digits=add_digit,
+                words=words, separator=separator
+            )
+            
+            analysis = result['analysis']
+            score_color = Colors.strength_color(analysis['score'])
+            print(f"\n{Colors.GREEN}Generated: {Colors.BRIGHT}{result['password']}{Colors.RESET}")
+            print(f"Entropy: {result['entropy']:.1f} bits")
+            print(f"Strength: {score_color}{analysis['strength']} ({analysis['score']}/100){Colors.RESET}")
+            print(f"Meter: {show_strength_meter(analysis['score'])}")
+            
+        except ValueError as e:
+            self.handle_error(e)
+
     def generate_multiple_passwords(self):
         if not self.current_user:
             print(Colors.error("Please login first"))
@@ -245,16 +298,16 @@ class InteractiveCLI:
             return
         
         try:
-            tests = self.service.get_test_history(self.current_user.username)
-            if not tests:
-                print(Colors.warning("No test history found"))
-                return
-            
-            print(f"\n{Colors.CYAN}Test History:{Colors.RESET}")
-            for test in tests:
+            def show(test):
                 score_color = Colors.strength_color(test.score)
                 print(f"Test ID {test.id} - {score_color}{test.score}/100 {test.strength_category}{Colors.RESET} - Breaches: {test.breach_count}")
-                
+            
+            username = self.current_user.username
+            self.show_pages(
+                lambda after_id: self.service.get_test_history_page(username, after_id),
+                show, f"\n{Colors.CYAN}Test History:{Colors.RESET}", "No test history found"
+            )
+            
         except ValueError as e:
             self.handle_error(e)
 
@@ -264,15 +317,15 @@ class InteractiveCLI:
             return
         
         try:
-            generations = self.service.get_generation_history(self.current_user.username)
-            if not generations:
-                print(Colors.warning("No generation history found"))
-                return
-            
-            print(f"\n{Colors.CYAN}Generation History:{Colors.RESET}")
-            for gen in generations:
+            def show(gen):
                 print(f"Test ID {gen.id} - Score: {gen.score}/100 - {gen.strength_category}")
-                
+            
+            username = self.current_user.username
+            self.show_pages(
+                lambda after_id: self.service.get_generation_history_page(username, after_id),
+                show, f"\n{Colors.CYAN}Generation History:{Colors.RESET}", "No generation history found"
+            )
+            
         except ValueError as e:
             self.handle_error(e)
 
@@ -296,15 +349,16 @@ class InteractiveCLI:
         threshold = int(self.get_input("Enter weakness threshold (default 40)", "40"))
         
         try:
-            weak_tests = self.service.get_weak_tests(threshold)
-            if not weak_tests:
+            def show(test):
+                print(f"User {test.user_id} - {Colors.RED}{test.score}/100 {test.strength_category}{Colors.RESET} - Test ID: {test.id}")
+            
+            shown = self.show_pages(
+                lambda after_id: self.service.get_weak_tests_page(threshold, after_id),
+                show, f"\n{Colors.RED}Weak Passwords (< {threshold}):{Colors.RESET}"
+            )
+            if not shown:
                 print(Colors.success(f"No passwords found below threshold {threshold}"))
-                return
             
-            print(f"\n{Colors.RED}Weak Passwords (< {threshold}):{Colors.RESET}")
-            for test in weak_tests:
-                print(f"User {test.user_id} - {Colors.RED}{test.score}/100 {test.strength_category}{Colors.RESET} - Test ID: {test.id}")
-                
         except Exception as e:
             self.handle_error(e)
 
@@ -348,16 +402,11 @@ class InteractiveCLI:
 
     def system_overview(self):
         try:
-            users = self.service.get_all_users()
-            weak_tests = self.service.get_weak_tests(40)
-            all_breaches = self.service.get_all_breaches()
-            
-            total_tests = sum(user.test_count for user in users)
-            total_generations = sum(user.generation_count for user in users)
+            overview = self.service.get_system_overview(40)
             
             print(f"\n{Colors.CYAN}System Overview:{Colors.RESET}")
-            print(f"Users: {len(users)} | Tests: {total_tests} | Generated: {total_generations}")
-            print(f"Weak Tests: {Colors.RED}{len(weak_tests)}{Colors.RESET} | Breaches: {Colors.RED}{len(all_breaches)}{Colors.RESET}")
+            print(f"Users: {overview['users']} | Tests: {overview['tests']} | Generated: {overview['generated']}")
+            print(f"Weak Tests: {Colors.RED}{overview['weak_tests']}{Colors.RESET} | Breaches: {Colors.RED}{overview['breaches']}{Colors.RESET}")
             
         except Exception as e:
             self.handle_error(e)
@@ -380,6 +429,7 @@ class InteractiveCLI:
             "generate": {
                 "Generate Single Password": self.generate_password,
                 "Generate Multiple Options": self.generate_multiple_passwords,
+                "Generate Passphrase": self.generate_passphrase,
                 "View Generation History": self.view_generation_history
             },
             "breach": {
@@ -0,0 +1,278 @@
+# commands.py
+"""Non-interactive commands: python main.py <command> [options]"""
+import argparse
+import io
+import string
+import sys
+import time
+
+from colors import Colors
+
+
+def report(message):
+    """Status output goes to stderr so stdout stays usable for data"""
+    print(message, file=sys.stderr)
+
+
+def build_common_index_command(args):
+    from common_passwords import build_common_index
+    
+    start = time.perf_counter()
+    count = build_common_index(args.wordlist, args.output, args.bloom_bits)
+    elapsed = time.perf_counter() - start
+    report(Colors.success(f"Indexed {count} unique passwords into {args.output} ({elapsed:.1f}s)"))
+    return 0
+
+
+def build_breach_index_command(args):
+    from breach_index import build_breach_index
+    
+    start = time.perf_counter()
+    count = build_breach_index(args.dump, args.output)
+    elapsed = time.perf_counter() - start
+    report(Colors.success(f"Indexed {count} breached password hashes into {args.output} ({elapsed:.1f}s)"))
+    return 0
+
+
+def build_dictionary_command(args):
+    from dictionary_matcher import build_dictionary
+    
+    start = time.perf_counter()
+    states = build_dictionary(args.wordlist, args.output, args.min_length)
+    elapsed = time.perf_counter() - start
+    report(Colors.success(f"Compiled dictionary automaton with {states} states into {args.output} ({elapsed:.1f}s)"))
+    return 0
+
+
+def build_wordlist_command(args):
+    from passphrase import build_wordlist
+    
+    start = time.perf_counter()
+    count = build_wordlist(args.wordlist, args.output)
+    elapsed = time.perf_counter() - start
+    report(Colors.success(f"Indexed {count} passphrase words into {args.output} ({elapsed:.1f}s)"))
+    return 0
+
+
+def summary_command(args):
+    from database import SessionLocal, init_db
+    from user_summary import rebuild_summary, verify_summary
+    
+    init_db()
+    session = SessionLocal()
+    try:
+        drift = verify_summary(session) if args.verify else rebuild_summary(session)
+    finally:
+        session.close()
+    for item in drift:
+        report(f"user {item.user_id}: {item.counter} stored {item.stored}, actual {item.actual}")
+    if args.verify:
+        if drift:
+            report(Colors.warning(f"User summary has drifted ({len(drift)} differences); run without --verify to rebuild"))
+            return 1
+        report(Colors.success("User summary matches the base tables"))
+    else:
+        report(Colors.success(f"Rebuilt user summary ({len(drift)} differences corrected)"))
+    return 0
+
+
+def migrate_command(args):
+    from database import engine, init_db
+    from migrations import LATEST_VERSION, pending_migrations
+    
+    pending = pending_migrations(engine)
+    if args.status:
+        for migration in pending:
+            report(f"pending {migration.version}: {migration.description}")
+        report(f"Schema version {LATEST_VERSION - len(pending)} of {LATEST_VERSION}")
+        return 1 if pending else 0
+    init_db()
+    for migration in pending:
+        report(f"applied {migration.version}: {migration.description}")
+    report(Colors.success(f"Database schema is at version {LATEST_VERSION}"))
+    return 0
+
+
+def open_input(path):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace", newline="")
+    return open(path, encoding="utf-8", errors="replace", newline="")
+
+
+def open_output(path):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def audit_command(args):
+    from audit import audit_stream, read_passwords
+    
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    source = open_input(args.input)
+    output = open_output(args.output)
+    start = time.perf_counter()
+    try:
+        count = audit_stream(read_passwords(source), output, fmt, args.workers,
+                             args.chunk_size, args.include_passwords)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    report(Colors.success(f"Audited {count:,} passwords in {elapsed:.2f}s ({rate:,.0f} records/sec)"))
+    return 0
+
+
+def generate_command(args):
+    from password_generator import PasswordGenerator
+    from password_scanner import SYMBOLS
+    
+    service = None
+    if not args.no_record:
+        if not args.user:
+            report(Colors.error("--user is required to record generated passwords (or pass --no-record)"))
+            return 2
+        from database import init_db
+        from password_checker import PasswordService
+        init_db()
+        service = PasswordService()
+        # Check the user before any password is written, so nothing goes out unrecorded
+        if service.get_user(args.user) is None:
+            report(Colors.error(f"User '{args.user}' not found"))
+            return 2
+    
+    if args.template or args.exclude_ambiguous or args.no_repeats or args.min_score is not None:
+        from password_policy import PasswordPolicy
+        excluded = ((string.ascii_uppercase if args.no_uppercase else "")
+                    + (string.digits if args.no_digits else "")
+                    + (SYMBOLS if args.no_symbols else ""))
+        policy = PasswordPolicy(
+            length=args.length, min_upper=int(not args.no_uppercase), min_digits=int(not args.no_digits),
+            min_symbols=int(not args.no_symbols), template=args.template,
+            exclude_ambiguous=args.exclude_ambiguous, exclude=excluded,
+            no_repeats=args.no_repeats, min_score=args.min_score
+        )
+        try:
+            sampler = policy.compile(service.analyzer if service else None)
+        except ValueError as e:
+            report(Colors.error(str(e)))
+            return 2
+        batches = sampler.generate_batches(args.count, args.batch_size)
+    else:
+        generator = PasswordGenerator()
+        batches = generator.generate_batches(
+            args.count, args.length, not args.no_uppercase, not args.no_digits, not args.no_symbols,
+            args.batch_size
+        )
+    output = open_output(args.output)
+    count = 0
+    start = time.perf_counter()
+    try:
+        for batch in batches:
+            output.write("\n".join(batch) + "\n")
+            if service:
+                service.record_generated_passwords(args.user, batch)
+            count += len(batch)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    recorded = f", recorded for {args.user}" if service else ""
+    report(Colors.success(f"Generated {count:,} passwords in {elapsed:.2f}s ({rate:,.0f} passwords/sec{recorded})"))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Password Security & Generator CLI. Run without a command for the interactive menu."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build_index = commands.add_parser(
+        "build-common-index", help="Build a memory-mapped common-password index from a wordlist"
+    )
+    build_index.add_argument("wordlist", help="Plain-text wordlist, one password per line")
+    build_index.add_argument("output", help="Index file to write")
+    build_index.add_argument("--bloom-bits", type=int, default=10,
+                             help="Bloom filter bits per entry, 0 to disable (default 10)")
+    build_index.set_defaults(func=build_common_index_command)
+    
+    build_breach = commands.add_parser(
+        "build-breach-index", help="Build an offline breached-password index from a SHA1:count dump"
+    )
+    build_breach.add_argument("dump", help="Breach dump with one SHA1:count line per password")
+    build_breach.add_argument("output", help="Index file to write")
+    build_breach.set_defaults(func=build_breach_index_command)
+    
+    build_dict = commands.add_parser(
+        "build-dictionary", help="Compile a wordlist into an Aho-Corasick dictionary automaton"
+    )
+    build_dict.add_argument("wordlist", help="Plain-text wordlist, one word per line")
+    build_dict.add_argument("output", help="Automaton file to write")
+    build_dict.add_argument("--min-length", type=int, default=4,
+                            help="Ignore words shorter than this (default 4)")
+    build_dict.set_defaults(func=build_dictionary_command)
+    
+    build_words = commands.add_parser(
+        "build-wordlist", help="Build a memory-mapped passphrase wordlist"
+    )
+    build_words.add_argument("wordlist", help="Wordlist, one word per line (diceware numbering is ignored)")
+    build_words.add_argument("output", help="Wordlist file to write")
+    build_words.set_defaults(func=build_wordlist_command)
+    
+    summary = commands.add_parser("summary", help="Rebuild the per-user summary table from the base tables")
+    summary.add_argument("--verify", action="store_true", help="Only report drift, do not rewrite the table")
+    summary.set_defaults(func=summary_command)
+    
+    migrate = commands.add_parser("migrate", help="Create missing tables and upgrade an existing database schema")
+    migrate.add_argument("--status", action="store_true",
+                         help="Only list pending migrations (exit status 1 if any)")
+    migrate.set_defaults(func=migrate_command)
+    
+    audit = commands.add_parser("audit", help="Score a file of passwords in parallel")
+    audit.add_argument("input", nargs="?", default="-", help="Password file, one per line (default stdin)")
+    audit.add_argument("-o", "--output", default="-", help="Results file (default stdout)")
+    audit.add_argument("--format", choices=["jsonl", "csv"],
+                       help="Output format (default csv for .csv outputs, otherwise jsonl)")
+    audit.add_argument("-w", "--workers", type=int, default=None,
+                       help="Worker processes (default: CPU count, 1 scores in-process)")
+    audit.add_argument("--chunk-size", type=int, default=20000, help="Passwords per work unit (default 20000)")
+    audit.add_argument("--include-passwords", action="store_true",
+                       help="Include the plaintext password in each result")
+    audit.set_defaults(func=audit_command)
+    
+    generate = commands.add_parser("generate", help="Stream generated passwords to a file or stdout")
+    generate.add_argument("count", type=int, help="Number of passwords to generate")
+    generate.add_argument("-l", "--length", type=int, default=16, help="Password length (default 16)")
+    generate.add_argument("-o", "--output", default="-", help="Output file, one password per line (default stdout)")
+    generate.add_argument("--no-uppercase", action="store_true", help="Leave out uppercase letters")
+    generate.add_argument("--no-digits", action="store_true", help="Leave out digits")
+    generate.add_argument("--no-symbols", action="store_true", help="Leave out symbols")
+    generate.add_argument("-u", "--user", help="Record the generated passwords' scores for this user")
+    generate.add_argument("--no-record", action="store_true", help="Only write the passwords, do not touch the database")
+    generate.add_argument("-t", "--template",
+                          help="Template such as LLLL-DDDD-SSSS (l lower, u upper, L letter, D digit, S symbol, "
+                               "A any, \\ escapes, anything else literal); overrides --length")
+    generate.add_argument("--exclude-ambiguous", action="store_true", help="Leave out look-alikes such as 0/O and 1/l")
+    generate.add_argument("--no-repeats", action="store_true", help="Never use a character twice in one password")
+    generate.add_argument("--min-score", type=int, default=None,
+                          help="Guarantee at least this analyzer score (rejected up front if the policy cannot)")
+    generate.add_argument("--batch-size", type=int, default=65536,
+                          help="Passwords generated and written per chunk (default 65536)")
+    generate.set_defaults(func=generate_command)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,161 @@
+# common_passwords.py
+"""Memory-mapped common-password corpus stored as sorted 64-bit hashes.
+
+A plain-text wordlist (one password per line) is turned into a compact
+index file once with build_common_index(). CommonPasswordIndex then maps
+that file and answers membership by binary search, so memory stays flat and
+opening the index is instant regardless of corpus size. An optional Bloom
+filter stored in the same file lets most misses return without searching.
+
+File layout (little-endian):
+    header   magic, entry count, longest entry, bloom bits, bloom hashes
+    bloom    bloom bits rounded up to a multiple of 64
+    hashes   entry count x uint64, sorted ascending
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'PWCIDX01'
+HEADER = struct.Struct('<8sQQQQ')
+BUILD_BATCH = 1_000_000
+
+
+def password_hash(text):
+    """64-bit hash used for corpus entries (callers pass lowercased text)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def password_hashes(texts):
+    """Vector form of password_hash, returned as a uint64 array"""
+    digests = b''.join(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest() for t in texts)
+    return np.frombuffer(digests, dtype='<u8')
+
+
+def _read_wordlist(path):
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        for line in f:
+            word = line.rstrip('\r\n').lower()
+            if word:
+                yield word
+
+
+def build_common_index(wordlist_path, index_path, bloom_bits_per_entry=10):
+    """Build an index file from a wordlist and return the number of unique entries.
+
+    Entries are lowercased, since the analyzer compares lowercased passwords.
+    Pass bloom_bits_per_entry=0 to skip the Bloom filter.
+    """
+    batches = []
+    batch = []
+    max_length = 0
+    for word in _read_wordlist(wordlist_path):
+        batch.append(word)
+        if len(word) > max_length:
+            max_length = len(word)
+        if len(batch) >= BUILD_BATCH:
+            batches.append(np.unique(password_hashes(batch)))
+            batch = []
+    if batch:
+        batches.append(np.unique(password_hashes(batch)))
+    hashes = np.unique(np.concatenate(batches)) if batches else np.zeros(0, dtype='<u8')
+    count = len(hashes)
+
+    bloom_bits = bloom_hashes = 0
+    bloom = b''
+    if bloom_bits_per_entry and count:
+        bloom_bits = -(-count * bloom_bits_per_entry // 64) * 64
+        bloom_hashes = max(1, round(bloom_bits_per_entry * math.log(2)))
+        bits = np.zeros(bloom_bits, dtype=bool)
+        for positions in _bloom_positions(hashes, bloom_bits, bloom_hashes):
+            bits[positions] = True
+        bloom = np.packbits(bits, bitorder='little').tobytes()
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, max_length, bloom_bits, bloom_hashes))
+        f.write(bloom)
+        f.write(hashes.astype('<u8').tobytes())
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def _bloom_positions(hashes, bloom_bits, bloom_hashes):
+    """Yield the bit positions of every probe (double hashing on the 64-bit hash)"""
+    h1 = hashes & np.uint64(0xFFFFFFFF)
+    h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+    for i in range(bloom_hashes):
+        yield (h1 + np.uint64(i) * h2) % np.uint64(bloom_bits)
+
+
+class CommonPasswordIndex:
+    """Read-only view of an index file built by build_common_index"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # The file this index was opened from, as part of PasswordAnalyzer.cache_key
+            self.identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, self.max_length, self.bloom_bits, self.bloom_hashes = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a common-password index")
+
+        self._bloom_offset = HEADER.size
+        self._bloom = np.frombuffer(self._mmap, dtype=np.uint8,
+                                    count=self.bloom_bits // 8, offset=self._bloom_offset)
+        self._hashes = np.frombuffer(self._mmap, dtype='<u8', count=self.count,
+                                     offset=self._bloom_offset + self.bloom_bits // 8)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, lowered):
+        if len(lowered) > self.max_length:
+            return False
+        h = password_hash(lowered)
+
+        if self.bloom_bits:
+            mm, offset = self._mmap, self._bloom_offset
+            h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+            for i in range(self.bloom_hashes):
+                pos = (h1 + i * h2) % self.bloom_bits
+                if not mm[offset + (pos >> 3)] >> (pos & 7) & 1:
+                    return False
+
+        i = int(self._hashes.searchsorted(np.uint64(h)))
+        return i < self.count and int(self._hashes[i]) == h
+
+    def contains_many(self, lowered):
+        """Membership for a batch of lowercased passwords, as a bool array"""
+        lowered = list(lowered)
+        found = np.zeros(len(lowered), dtype=bool)
+        if not self.count:
+            return found
+        rows = np.flatnonzero(np.fromiter(
+            (len(p) <= self.max_length for p in lowered), dtype=bool, count=len(lowered)
+        ))
+        hashes = password_hashes([lowered[i] for i in rows])
+
+        if self.bloom_bits:
+            maybe = np.ones(len(hashes), dtype=bool)
+            for positions in _bloom_positions(hashes, self.bloom_bits, self.bloom_hashes):
+                bytes_ = self._bloom[positions >> np.uint64(3)]
+                maybe &= ((bytes_ >> (positions & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+            rows, hashes = rows[maybe], hashes[maybe]
+
+        i = np.minimum(self._hashes.searchsorted(hashes), self.count - 1)
+        found[rows] = self._hashes[i] == hashes
+        return found
+
+    def close(self):
+        self._bloom = self._hashes = None
+        self._mmap.close()
@@ -0,0 +1,30 @@
+# config.py
+"""Runtime settings, overridable through environment variables."""
+import os
+
+# Common-password corpus built with `python main.py build-common-index`
+COMMON_PASSWORDS_INDEX = os.environ.get("PASSWORD_CHECKER_COMMON_INDEX")
+
+# Offline breach index built with `python main.py build-breach-index`
+BREACH_INDEX = os.environ.get("PASSWORD_CHECKER_BREACH_INDEX")
+
+# Aho-Corasick dictionary built with `python main.py build-dictionary`
+DICTIONARY = os.environ.get("PASSWORD_CHECKER_DICTIONARY")
+
+# Passphrase wordlist built with `python main.py build-wordlist`
+WORDLIST = os.environ.get("PASSWORD_CHECKER_WORDLIST")
+
+# Opt-in analyze_password result cache: entry limit (0 disables) and TTL in seconds
+ANALYSIS_CACHE_SIZE = int(os.environ.get("PASSWORD_CHECKER_ANALYSIS_CACHE_SIZE", "0"))
+ANALYSIS_CACHE_TTL = float(os.environ.get("PASSWORD_CHECKER_ANALYSIS_CACHE_TTL", "300"))
+
+# Opt-in write-behind recording of password tests: rows per group commit (0 records
+# synchronously, the default) and the longest a row waits before its batch is written
+WRITE_BEHIND_BATCH = int(os.environ.get("PASSWORD_CHECKER_WRITE_BEHIND_BATCH", "0"))
+WRITE_BEHIND_DELAY = float(os.environ.get("PASSWORD_CHECKER_WRITE_BEHIND_DELAY", "0.05"))
+
+# Database location and SQLite storage profile ("durable", "throughput" or "compatible",
+# see STORAGE_PROFILES in database.py) and connections kept open per process
+DATABASE_URL = os.environ.get("PASSWORD_CHECKER_DATABASE_URL", "sqlite:///password_checker.db")
+STORAGE_PROFILE = os.environ.get("PASSWORD_CHECKER_STORAGE_PROFILE", "durable")
+DATABASE_POOL_SIZE = int(os.environ.get("PASSWORD_CHECKER_DATABASE_POOL_SIZE", "5"))
@@ -1,17 +1,134 @@
 # database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
-DATABASE_URL = "sqlite:///password_checker.db"
+import config
 
-# echo=True will show SQL in the console — set to False if you prefer quiet output
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+# SQLite settings applied to every new connection, by profile name.
+#   durable     WAL with a full fsync per commit: nothing committed is ever lost
+#   throughput  WAL syncing at checkpoints only: a power cut can lose the last
+#               commits (never corrupts), bigger cache and memory-mapped reads
+#   compatible  rollback journal, for filesystems without shared memory (NFS, SMB)
+# All of them wait up to busy_timeout ms for another process's lock instead of
+# failing at once with "database is locked". In WAL mode readers never block the
+# writer or each other, across processes as well as threads.
+STORAGE_PROFILES = {
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,  # negative sizes are KiB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "throughput": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "compatible": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+
+
+def _storage_profile(profile):
+    profile = profile or config.STORAGE_PROFILE
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile '{profile}' (choose from {', '.join(STORAGE_PROFILES)})")
+    return STORAGE_PROFILES[profile]
+
+
+def _is_file_database(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _apply_storage_profile(sync_engine, pragmas):
+    """Run a profile's pragmas on every new SQLite connection of sync_engine"""
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_storage_profile(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # busy_timeout comes first so the journal mode switch also waits for locks
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def create_database_engine(url=None, profile=None, pool_size=None):
+    """Engine for url (config.DATABASE_URL by default) with a storage profile applied to SQLite connections"""
+    url = url or config.DATABASE_URL
+    pragmas = _storage_profile(profile)
+
+    options = {}
+    if _is_file_database(url):
+        # Keep connections (and their page caches) open instead of reconnecting per
+        # session; sessions hand them between threads, e.g. to the write-behind recorder
+        options = {
+            "poolclass": QueuePool,
+            "pool_size": pool_size or config.DATABASE_POOL_SIZE,
+            "connect_args": {"check_same_thread": False},
+        }
+    # echo=True will show SQL in the console — set to False if you prefer quiet output
+    new_engine = create_engine(url, echo=False, future=True, **options)
+    _apply_storage_profile(new_engine, pragmas)
+    return new_engine
+
+
+def create_async_database_engine(url=None, profile=None, pool_size=None):
+    """AsyncEngine over aiosqlite for the same database and storage profile as create_database_engine"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    url = make_url(url or config.DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    pragmas = _storage_profile(profile)
+
+    options = {}
+    if _is_file_database(url):
+        options = {"poolclass": AsyncAdaptedQueuePool, "pool_size": pool_size or config.DATABASE_POOL_SIZE}
+    async_engine = create_async_engine(url, echo=False, future=True, **options)
+    _apply_storage_profile(async_engine.sync_engine, pragmas)
+    return async_engine
+
+
+# Set PASSWORD_CHECKER_DATABASE_URL / PASSWORD_CHECKER_STORAGE_PROFILE to change these
+DATABASE_URL = config.DATABASE_URL
+
+engine = create_database_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
 
 Base = declarative_base()
 
 def init_db():
-    """Create all tables (imports models so they are registered)."""
+    """Create all tables (imports models so they are registered) and upgrade existing ones."""
     import models  # noqa: F401 - ensures models are loaded
+    from migrations import migrate
+    from user_summary import rebuild_summary
+    new_summary = not inspect(engine).has_table("user_summary")
     Base.metadata.create_all(bind=engine)
+    migrate(engine)
+    if new_summary:
+        # Databases from before the summary table get it filled from their history
+        session = SessionLocal()
+        try:
+            rebuild_summary(session)
+        finally:
+            session.close()
@@ -0,0 +1,174 @@
+# dictionary_matcher.py
+"""Aho-Corasick dictionary matching for embedded words.
+
+build_dictionary() compiles a wordlist once into a dense Aho-Corasick
+automaton (goto and failure links folded into one transition table) and
+writes it to disk. DictionaryMatcher maps that file, so it loads without
+rebuilding, and finds every embedded dictionary word in a single pass over
+the password: one table lookup per character, however large the wordlist.
+
+File layout (little-endian):
+    header    magic, state count, symbol count, alphabet size in bytes
+    alphabet  UTF-8 characters that map to symbols 1..n (0 is "any other"),
+              padded to a multiple of 8 bytes
+    delta     state count x symbol count int32 transitions
+    longest   state count uint8, longest word ending in each state
+"""
+import mmap
+import os
+import struct
+from collections import deque
+
+import numpy as np
+
+MAGIC = b'PWDACM01'
+HEADER = struct.Struct('<8sQQQ')
+MIN_WORD_LENGTH = 4
+MAX_WORD_LENGTH = 255
+
+
+def _read_words(path, min_word_length):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            word = line.strip().lower()
+            if min_word_length <= len(word) <= MAX_WORD_LENGTH:
+                yield word
+
+
+def _compile(words):
+    """Build the dense transition table and per-state longest match"""
+    children = [{}]
+    longest = [0]
+    alphabet = {}
+    for word in words:
+        state = 0
+        for ch in word:
+            symbol = alphabet.setdefault(ch, len(alphabet) + 1)
+            nxt = children[state].get(symbol)
+            if nxt is None:
+                nxt = children[state][symbol] = len(children)
+                children.append({})
+                longest.append(0)
+            state = nxt
+        longest[state] = len(word)
+
+    num_symbols = len(alphabet) + 1
+    delta = np.zeros((len(children), num_symbols), dtype=np.int32)
+    longest = np.array(longest, dtype=np.uint8)
+
+    # Breadth-first: a state's failure target is always finished before it
+    queue = deque()
+    for symbol, child in children[0].items():
+        delta[0, symbol] = child
+        queue.append((child, 0))
+    while queue:
+        state, fail = queue.popleft()
+        longest[state] = max(longest[state], longest[fail])
+        delta[state] = delta[fail]
+        for symbol, child in children[state].items():
+            delta[state, symbol] = child
+            queue.append((child, delta[fail, symbol]))
+    delta[:, 0] = 0
+
+    return ''.join(sorted(alphabet, key=alphabet.get)), delta, longest
+
+
+def build_dictionary(wordlist_path, output_path, min_word_length=MIN_WORD_LENGTH):
+    """Compile a wordlist into an automaton file and return its state count"""
+    alphabet, delta, longest = _compile(_read_words(wordlist_path, min_word_length))
+    encoded = alphabet.encode('utf-8')
+    padding = -len(encoded) % 8
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, delta.shape[0], delta.shape[1], len(encoded)))
+        f.write(encoded + bytes(padding))
+        f.write(delta.astype('<i4').tobytes())
+        f.write(longest.tobytes())
+    os.replace(tmp_path, output_path)
+    return delta.shape[0]
+
+
+class DictionaryMatcher:
+    """Read-only automaton loaded from a file written by build_dictionary"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # The file this index was opened from, as part of PasswordAnalyzer.cache_key
+            self.identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.num_states, self.num_symbols, alphabet_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a dictionary automaton")
+
+        offset = HEADER.size
+        alphabet = self._mmap[offset:offset + alphabet_size].decode('utf-8')
+        offset += alphabet_size + (-alphabet_size % 8)
+        self.symbols = {ch: i for i, ch in enumerate(alphabet, 1)}
+        self._delta = np.frombuffer(self._mmap, dtype='<i4', count=self.num_states * self.num_symbols,
+                                    offset=offset)
+        offset += 4 * self.num_states * self.num_symbols
+        self._longest = np.frombuffer(self._mmap, dtype=np.uint8, count=self.num_states, offset=offset)
+
+        # Flat memoryviews index much faster than numpy scalars in the per-call walk
+        self._delta_view = memoryview(self._delta)
+        self._longest_view = memoryview(self._longest)
+
+        # Symbol lookup for ASCII bytes, used by the batch kernel
+        self.byte_symbols = np.zeros(256, dtype=np.int32)
+        for ch, symbol in self.symbols.items():
+            if ord(ch) < 256:
+                self.byte_symbols[ord(ch)] = symbol
+
+    def step(self, state, ch):
+        """Transition on one lowercased character; returns (state, longest match ending here)"""
+        state = self._delta_view[state * self.num_symbols + self.symbols.get(ch, 0)]
+        return state, self._longest_view[state]
+
+    def coverage(self, lowered):
+        """Number of characters of a lowercased password inside dictionary words"""
+        delta, longest = self._delta_view, self._longest_view
+        symbols, width = self.symbols, self.num_symbols
+        state = 0
+        covered = 0
+        spans = []  # disjoint [start, end] spans covered so far, in order
+        for end, ch in enumerate(lowered):
+            state = delta[state * width + symbols.get(ch, 0)]
+            length = longest[state]
+            if length:
+                start = end - length + 1
+                while spans and spans[-1][0] >= start:
+                    span = spans.pop()
+                    covered -= span[1] - span[0] + 1
+                if spans and spans[-1][1] >= start:
+                    covered += end - spans[-1][1]
+                    spans[-1][1] = end
+                else:
+                    spans.append([start, end])
+                    covered += length
+        return covered
+
+    def coverage_many(self, lowered):
+        """Vector form of coverage for a zero-padded (n, width) uint8 array of lowercased rows"""
+        rows, width = lowered.shape
+        symbols = self.byte_symbols[lowered]
+        state = np.zeros(rows, dtype=np.int64)
+        start = np.empty((rows, width), dtype=np.int64)
+        for end in range(width):
+            state = self._delta[state * self.num_symbols + symbols[:, end]]
+            length = self._longest[state].astype(np.int64)
+            start[:, end] = np.where(length > 0, end - length + 1, width)
+
+        # A position is covered when some match ending at or after it starts at or before it
+        reach = np.minimum.accumulate(start[:, ::-1], axis=1)[:, ::-1]
+        return np.count_nonzero(reach <= np.arange(width), axis=1)
+
+    def close(self):
+        self._delta_view.release()
+        self._longest_view.release()
+        self._delta = self._longest = self._delta_view = self._longest_view = None
+        self._mmap.close()
@@ -0,0 +1,133 @@
+# incremental_analyzer.py
+"""As-you-type password scoring.
+
+IncrementalAnalysis keeps the scanner state for every prefix of the text
+being typed, so append and backspace cost O(1) per character instead of
+re-scanning the whole password. The corpus checks are bounded too: the
+SHA-1 for the breach index is carried forward with hashlib's copy(), the
+dictionary automaton steps one character at a time, and the common-password
+lookup is skipped once the text is longer than any corpus entry.
+"""
+import hashlib
+
+from password_analyzer import PasswordAnalyzer
+from password_scanner import PasswordSignals, LOWER, UPPER, DIGIT, SYMBOL, NONALPHA, REPEAT, pattern_steps
+from keyboard_patterns import SECOND_SHIFT, FIRST_BITS, WALK_BITS
+
+
+class IncrementalAnalysis:
+    """Analysis of a password edited one character at a time.
+
+    analysis() always equals PasswordAnalyzer.analyze_password(text).
+    """
+
+    def __init__(self, analyzer=None, text=''):
+        self.analyzer = analyzer if analyzer is not None else PasswordAnalyzer()
+        self.reset(text)
+
+    def reset(self, text=''):
+        """Start over from text (also picks up rule set or corpus changes)"""
+        analyzer = self.analyzer
+        self._version = analyzer.ruleset_version
+        self._transitions = analyzer.scanner.transitions
+        self._dictionary = analyzer.dictionary
+        self._breach_index = analyzer.breach_index
+        self._common_limit = max(map(len, analyzer.common_passwords), default=0)
+        if analyzer.common_index is not None:
+            self._common_limit = max(self._common_limit, analyzer.common_index.max_length)
+
+        self._chars = []
+        self._lowered = []
+        self._covered = []  # per lowercased character: inside a dictionary word
+        # One state per prefix: (mask, pattern bits found, transitions from the last
+        # character, last two steps, lowered length, automaton state, covered count,
+        # positions newly covered by the last character, SHA-1 of the prefix)
+        sha1 = hashlib.sha1() if self._breach_index is not None else None
+        self._states = [(0, 0, self._transitions, 0, 0, 0, 0, 0, (), sha1)]
+        self.append(text)
+
+    @property
+    def text(self):
+        return ''.join(self._chars)
+
+    def __len__(self):
+        return len(self._chars)
+
+    def append(self, text):
+        """Add characters to the end of the password"""
+        chars, states, covered_flags = self._chars, self._states, self._covered
+        dictionary = self._dictionary
+        for ch in text:
+            (mask, found, transitions, prev2_step, prev_step, lowered_length, automaton,
+             covered, _, sha1) = states[-1]
+            bits, step, transitions = transitions[ch]
+            mask |= bits
+
+            # Same rules as PasswordScanner.scan, applied to one character
+            if step:
+                found |= prev_step & ((step >> SECOND_SHIFT) & FIRST_BITS | step & REPEAT
+                                      | prev2_step & step & WALK_BITS)
+
+            lowered = ch.lower()
+            newly_covered = []
+            if dictionary is not None:
+                for lowered_ch in lowered:
+                    end = len(covered_flags)
+                    covered_flags.append(False)
+                    automaton, word_length = dictionary.step(automaton, lowered_ch)
+                    for i in range(end - word_length + 1, end + 1):
+                        if not covered_flags[i]:
+                            covered_flags[i] = True
+                            newly_covered.append(i)
+                covered += len(newly_covered)
+
+            if sha1 is not None:
+                sha1 = sha1.copy()
+                sha1.update(ch.encode('utf-8'))
+
+            chars.append(ch)
+            self._lowered.append(lowered)
+            states.append((mask, found, transitions, prev_step, step, lowered_length + len(lowered),
+                           automaton, covered, newly_covered, sha1))
+
+    def backspace(self, count=1):
+        """Remove up to count characters from the end of the password"""
+        for _ in range(min(count, len(self._chars))):
+            state = self._states.pop()
+            for i in state[8]:
+                self._covered[i] = False
+            if self._dictionary is not None:
+                del self._covered[self._states[-1][5]:]
+            self._chars.pop()
+            self._lowered.pop()
+
+    def analysis(self):
+        """Full analysis of the current text, as analyze_password returns it"""
+        analyzer = self.analyzer
+        if analyzer.ruleset_version != self._version:
+            self.reset(self.text)
+
+        mask, found, _, _, _, lowered_length, _, covered, _, sha1 = self._states[-1]
+        repeats, sequential_numbers, sequential_letters, keyboard_walk = pattern_steps(found)
+        signals = PasswordSignals(
+            length=len(self._chars),
+            has_lower=bool(mask & LOWER),
+            has_upper=bool(mask & UPPER),
+            has_digit=bool(mask & DIGIT),
+            has_symbol=bool(mask & SYMBOL),
+            repeats=repeats,
+            sequential_numbers=sequential_numbers,
+            sequential_letters=sequential_letters,
+            keyboard_walk=keyboard_walk,
+            all_alpha=bool(self._chars) and not mask & NONALPHA,
+            lowered=None  # not kept; the common-password result is passed in instead
+        )
+        common = (lowered_length <= self._common_limit
+                  and analyzer.is_common_password(''.join(self._lowered)))
+        breach_count = self._breach_index.lookup_digest(sha1.digest()) if sha1 is not None else 0
+        coverage = covered if self._dictionary is not None else None
+        return analyzer.score_signals(signals, breach_count, coverage, common)
+
+    @property
+    def score(self):
+        return self.analysis()['score']
@@ -0,0 +1,136 @@
+# keyboard_patterns.py
+"""Precomputed character-pair transitions for sequence and keyboard-walk detection.
+
+Every pair of neighbouring ASCII characters maps to a bitmask of the
+patterns that step continues, so the scanner and the batch kernel detect
+every pattern with one table lookup per character:
+
+    sequences  ascending and descending digit or letter runs ("abc", "321");
+               a triple is found when two consecutive steps share a kind
+    walks      straight lines across a QWERTY or numpad layout ("qwerty",
+               "1qaz", "7410"); a walk is found when three consecutive steps
+               share a direction, so walks of any length from four keys on
+               are caught
+
+Characters are also read through a leetspeak table ("qw3rty", "@bc"), and
+shifted symbols sit on their unshifted key ("!@#$" walks like "1234").
+"""
+import string
+
+# Leetspeak substitutions: character -> letters it may stand for
+LEET = {
+    '0': 'o', '1': 'il', '2': 'z', '3': 'e', '4': 'a', '5': 's', '6': 'g', '7': 't',
+    '8': 'b', '9': 'g', '@': 'a', '$': 's', '!': 'i', '|': 'l', '+': 't', '(': 'c'
+}
+
+# Staggered QWERTY rows as (unshifted, shifted); each row sits about half a key
+# to the right of the one above, so (r, c) touches (r + 1, c - 1) and (r + 1, c)
+QWERTY_ROWS = (
+    ("1234567890-=", "!@#$%^&*()_+"),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+    ("asdfghjkl;'", "ASDFGHJKL:\""),
+    ("zxcvbnm,./", "ZXCVBNM<>?"),
+)
+QWERTY_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (1, -1), (-1, 1), (-1, 0))
+
+# Numpad grid, spaces are gaps
+NUMPAD_ROWS = (" /*-", "789+", "456", "123", "0 .")
+NUMPAD_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# Sequence kinds; a step sets a kind in FIRST_BITS when it may start a triple
+# and in SECOND_BITS when it may end one ("890" is a sequence, "901" is not)
+ASCENDING_DIGITS, DESCENDING_DIGITS, ASCENDING_LETTERS, DESCENDING_LETTERS = 1, 2, 4, 8
+DIGIT_SEQUENCES = ASCENDING_DIGITS | DESCENDING_DIGITS
+LETTER_SEQUENCES = ASCENDING_LETTERS | DESCENDING_LETTERS
+SECOND_SHIFT = 4
+FIRST_BITS = 0xF
+SECOND_BITS = FIRST_BITS << SECOND_SHIFT
+
+# One bit per layout direction above the sequence bits
+WALK_SHIFT = 8
+WALK_BITS = ((1 << (len(QWERTY_DIRECTIONS) + len(NUMPAD_DIRECTIONS))) - 1) << WALK_SHIFT
+
+
+def _sequence_keys(ch):
+    """Digits and letters a character can take part in a sequence as"""
+    if ch in string.digits:
+        return {ch}
+    keys = set(LEET.get(ch, ''))
+    if ch in string.ascii_letters:
+        keys.add(ch.lower())
+    return keys
+
+
+def _walk_keys(ch):
+    """Keys a character can stand for on a keyboard layout"""
+    return {ch.lower()} | set(LEET.get(ch, ''))
+
+
+def _layout_positions():
+    """Map each key to its (layout, row, column) positions"""
+    positions = {}
+    for r, rows in enumerate(QWERTY_ROWS):
+        for row in rows:
+            for c, key in enumerate(row):
+                positions.setdefault(key.lower(), set()).add(('qwerty', r, c))
+    for r, row in enumerate(NUMPAD_ROWS):
+        for c, key in enumerate(row):
+            if key != ' ':
+                positions.setdefault(key, set()).add(('numpad', r, c))
+    return positions
+
+
+def _key_steps():
+    """Map (key, next key) to the pattern bits that step belongs to"""
+    steps = {}
+
+    def add(a, b, bits):
+        steps[a, b] = steps.get((a, b), 0) | bits
+
+    for i in range(10):
+        a, up, down = str(i), str((i + 1) % 10), str((i - 1) % 10)
+        add(a, up, ASCENDING_DIGITS << SECOND_SHIFT | (0 if a == '9' else ASCENDING_DIGITS))
+        add(a, down, DESCENDING_DIGITS | (0 if a == '0' else DESCENDING_DIGITS << SECOND_SHIFT))
+    letters = string.ascii_lowercase
+    for a, b in zip(letters, letters[1:]):
+        add(a, b, ASCENDING_LETTERS | ASCENDING_LETTERS << SECOND_SHIFT)
+        add(b, a, DESCENDING_LETTERS | DESCENDING_LETTERS << SECOND_SHIFT)
+
+    grid = {}  # position -> keys on it (unshifted and shifted)
+    for key, places in _layout_positions().items():
+        for position in places:
+            grid.setdefault(position, set()).add(key)
+    directions = [('qwerty', d) for d in QWERTY_DIRECTIONS] + [('numpad', d) for d in NUMPAD_DIRECTIONS]
+    for (layout, r, c), keys in grid.items():
+        for bit, (direction_layout, (dr, dc)) in enumerate(directions):
+            if direction_layout != layout:
+                continue
+            for key in keys:
+                for neighbour in grid.get((layout, r + dr, c + dc), ()):
+                    add(key, neighbour, 1 << (WALK_SHIFT + bit))
+    return steps
+
+
+def build_step_table():
+    """Pattern bits for every pair of ASCII characters, as {(a, b): bits} without zeros"""
+    key_steps = _key_steps()
+    chars = [chr(code) for code in range(128)]
+    sequence_keys = {ch: _sequence_keys(ch) for ch in chars}
+    walk_keys = {ch: _walk_keys(ch) for ch in chars}
+
+    table = {}
+    for a in chars:
+        for b in chars:
+            bits = 0
+            for ka in sequence_keys[a]:
+                for kb in sequence_keys[b]:
+                    bits |= key_steps.get((ka, kb), 0) & (FIRST_BITS | SECOND_BITS)
+            for ka in walk_keys[a]:
+                for kb in walk_keys[b]:
+                    bits |= key_steps.get((ka, kb), 0) & WALK_BITS
+            if bits:
+                table[a, b] = bits
+    return table
+
+
+STEP_TABLE = build_step_table()
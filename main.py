@@ -8,6 +8,10 @@ from cli import InteractiveCLI
 
 if __name__ == "__main__":
     # Entry point for the password security application
-    # Always run interactive mode
+    if len(sys.argv) > 1:
+        # Non-interactive commands (see commands.py)
+        from commands import main
+        sys.exit(main(sys.argv[1:]))
+    
     cli = InteractiveCLI()
     cli.run()
\ No newline at end of file
@@ -0,0 +1,74 @@
+# migrations.py
+"""Versioned schema upgrades for existing databases.
+
+create_all() only creates missing tables; it never changes a table that
+already exists. Each entry in MIGRATIONS upgrades the schema by one version
+and is applied once, in order, in its own transaction. The schema version is
+kept in SQLite's user_version pragma, so an untouched database is version 0.
+
+Migrations are plain SQL written to be safe on a database whose tables were
+just created by create_all() from the current models (CREATE INDEX IF NOT
+EXISTS and the like), so a new database simply ends at the latest version.
+Never edit a migration once released; add a new one.
+"""
+from collections import namedtuple
+
+from sqlalchemy import text
+
+Migration = namedtuple('Migration', ['version', 'description', 'statements'])
+
+MIGRATIONS = [
+    Migration(1, "Index tests by user and by score, breaches by user, breach links by test", [
+        "CREATE INDEX IF NOT EXISTS ix_password_tests_user_generated ON password_tests (user_id, is_generated)",
+        "CREATE INDEX IF NOT EXISTS ix_password_tests_score ON password_tests (score)",
+        "CREATE INDEX IF NOT EXISTS ix_breaches_user_id ON breaches (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_breach_password_association_password_test_id "
+        "ON breach_password_association (password_test_id)",
+    ]),
+    Migration(2, "Rebuild users with AUTOINCREMENT so deleted user ids are never reused", [
+        # SQLite cannot add AUTOINCREMENT to a table in place. Copying the rows with their
+        # ids also starts sqlite_sequence at the highest id in use
+        "CREATE TABLE users_autoincrement ("
+        "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, "
+        "username VARCHAR NOT NULL, "
+        "password_hash VARCHAR NOT NULL, "
+        "UNIQUE (username))",
+        "INSERT INTO users_autoincrement (id, username, password_hash) "
+        "SELECT id, username, password_hash FROM users",
+        "DROP TABLE users",
+        "ALTER TABLE users_autoincrement RENAME TO users",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(connection):
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def pending_migrations(engine):
+    """Migrations not yet applied to the database"""
+    with engine.connect() as connection:
+        version = schema_version(connection)
+    if version > LATEST_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than this application "
+                           f"supports ({LATEST_VERSION})")
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def migrate(engine):
+    """Apply every pending migration in order; returns the ones applied"""
+    applied = []
+    for migration in pending_migrations(engine):
+        with engine.begin() as connection:
+            # pysqlite does not open a transaction before DDL, so take the write lock
+            # explicitly; the version is re-read under it in case another process migrated
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            if schema_version(connection) >= migration.version:
+                continue
+            for statement in migration.statements:
+                connection.execute(text(statement))
+            connection.execute(text(f"PRAGMA user_version = {migration.version}"))
+        applied.append(migration)
+    return applied
@@ -1,20 +1,28 @@
 # models.py
 """Database models for the password security application."""
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Table, Index, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import column_property, relationship
 from database import Base
 import bcrypt
 
+# Score at which a password counts as strong
+STRONG_SCORE = 60
+
 # Association table for many-to-many relationship between breaches and password_tests
 breach_password_association = Table(
     'breach_password_association',
     Base.metadata,
     Column('breach_id', Integer, ForeignKey('breaches.id'), primary_key=True),
-    Column('password_test_id', Integer, ForeignKey('password_tests.id'), primary_key=True)
+    Column('password_test_id', Integer, ForeignKey('password_tests.id'), primary_key=True),
+    Index('ix_breach_password_association_password_test_id', 'password_test_id')
 )
 
 class User(Base):
     __tablename__ = "users"
+    # Never reuse a deleted user's id: other processes may still have it cached (user_cache.py).
+    # Existing databases get this from migrations.py
+    __table_args__ = {'sqlite_autoincrement': True}
 
     id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, nullable=False)
@@ -22,23 +30,13 @@ class User(Base):
 
     password_tests = relationship("PasswordTest", back_populates="user", cascade="all, delete-orphan")
     breaches = relationship("Breach", back_populates="user", cascade="all, delete-orphan")
+    summary = relationship("UserSummary", uselist=False, cascade="all, delete-orphan")
 
-    @property
-    def test_count(self):
-        return len([t for t in self.password_tests if not t.is_generated])
-
-    @property
-    def generation_count(self):
-        return len([t for t in self.password_tests if t.is_generated])
-
-    @property
-    def breach_count(self):
-        return len(self.breaches)
+    # test_count, generation_count, breach_count and average_score come from the user's
+    # UserSummary row, defined below it and loaded on access (or with undefer_group('stats'))
 
     def get_average_test_score(self):
-        if not self.password_tests:
-            return 0
-        return sum(test.score for test in self.password_tests) / len(self.password_tests)
+        return self.average_score
 
     def get_latest_test(self):
         return self.password_tests[-1] if self.password_tests else None
@@ -54,6 +52,11 @@ class User(Base):
 
 class PasswordTest(Base):
     __tablename__ = "password_tests"
+    # Also created on existing databases by migrations.py; keep the two in step
+    __table_args__ = (
+        Index('ix_password_tests_user_generated', 'user_id', 'is_generated'),
+        Index('ix_password_tests_score', 'score'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -63,13 +66,13 @@ class PasswordTest(Base):
     user = relationship("User", back_populates="password_tests")
     breaches = relationship("Breach", secondary=breach_password_association, back_populates="affected_passwords")
 
-    @property
+    @hybrid_property
     def is_strong(self):
-        return self.score >= 60
+        return self.score >= STRONG_SCORE
 
     @property
     def strength_category(self):
-        if self.score >= 60:
+        if self.score >= STRONG_SCORE:
             return "Strong"
         else:
             return "Weak"
@@ -83,6 +86,7 @@ class PasswordTest(Base):
 
 class Breach(Base):
     __tablename__ = "breaches"
+    __table_args__ = (Index('ix_breaches_user_id', 'user_id'),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -105,4 +109,40 @@ class Breach(Base):
             self.affected_passwords.append(password_test)
 
     def __repr__(self):
-        return f"<Breach(id={self.id}, name={self.breach_name}, severity={self.severity})>"
\ No newline at end of file
+        return f"<Breach(id={self.id}, name={self.breach_name}, severity={self.severity})>"
+
+class UserSummary(Base):
+    """Per-user counters kept in step with password_tests and breaches (see user_summary.py)"""
+    __tablename__ = "user_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    test_count = Column(Integer, nullable=False, default=0)
+    generated_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    strong_count = Column(Integer, nullable=False, default=0)
+    breach_count = Column(Integer, nullable=False, default=0)
+
+    @property
+    def average_score(self):
+        total = self.test_count + self.generated_count
+        return self.score_sum / total if total else 0
+
+    def __repr__(self):
+        return f"<UserSummary(user_id={self.user_id}, tests={self.test_count}, generated={self.generated_count})>"
+
+# Per-user counts read from the summary row, so no collection is loaded to count them
+def _summary_value(expression):
+    return column_property(
+        func.coalesce(
+            select(expression).where(UserSummary.user_id == User.id).correlate_except(UserSummary).scalar_subquery(),
+            0
+        ),
+        deferred=True, group='stats'
+    )
+
+User.test_count = _summary_value(UserSummary.test_count)
+User.generation_count = _summary_value(UserSummary.generated_count)
+User.breach_count = _summary_value(UserSummary.breach_count)
+User.average_score = _summary_value(
+    UserSummary.score_sum * 1.0 / func.nullif(UserSummary.test_count + UserSummary.generated_count, 0)
+)
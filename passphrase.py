@@ -0,0 +1,166 @@
+# passphrase.py
+"""Diceware-style passphrases drawn from a memory-mapped wordlist.
+
+build_wordlist() converts a plain wordlist (one word per line; numbered
+diceware lists such as "11111<TAB>abacus" work too) into a file with a
+fixed-width offset table. WordList maps that file, so opening it costs
+nothing and fetching word i reads two offsets and one short slice, however
+long the list is.
+
+File layout (little-endian):
+    header   magic, word count, bits of entropy of one word token for each
+             CAPITALIZE option (worked out once here, so entropy() is a lookup)
+    offsets  (count + 1) x uint64 byte offsets of each word in the data
+    data     UTF-8 words, back to back
+"""
+import math
+import mmap
+import os
+import secrets
+import struct
+from collections import Counter
+
+import numpy as np
+
+MAGIC = b'PWWLST02'
+HEADER = struct.Struct('<8sQ3d')
+# Files from before the header held word entropies: bits are worked out on first use
+MAGIC_V1 = b'PWWLST01'
+HEADER_V1 = struct.Struct('<8sQ')
+OFFSET = struct.Struct('<QQ')
+CAPITALIZE = ('none', 'first', 'random')
+
+
+def _read_words(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                yield fields[-1]
+
+
+def word_bits(words, capitalize='none'):
+    """Bits of entropy of one word token drawn uniformly from words.
+
+    Counted over what PassphraseGenerator.generate() can output rather than
+    the raw list, so words that come out the same once capitalised ("apple",
+    "Apple") and words that capitalising leaves unchanged add nothing.
+    """
+    counts = Counter()
+    total = 0
+    for word in words:
+        if capitalize == 'none':
+            counts[word] += 2
+        elif capitalize == 'first':
+            counts[word.capitalize()] += 2
+        else:
+            counts[word] += 1
+            counts[word.capitalize()] += 1
+        total += 2
+    return -sum(n / total * math.log2(n / total) for n in counts.values())
+
+
+def build_wordlist(wordlist_path, output_path):
+    """Write the unique words of a wordlist to an indexed file and return the word count"""
+    unique = list(dict.fromkeys(_read_words(wordlist_path)))
+    bits = [word_bits(unique, capitalize) if unique else 0.0 for capitalize in CAPITALIZE]
+    words = [word.encode('utf-8') for word in unique]
+    offsets = np.zeros(len(words) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(word) for word in words])
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(words), *bits))
+        f.write(offsets.tobytes())
+        f.write(b''.join(words))
+    os.replace(tmp_path, output_path)
+    return len(words)
+
+
+class WordList:
+    """Read-only view of a file written by build_wordlist"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mmap[:len(MAGIC)]
+        if magic == MAGIC:
+            _, self.count, *bits = HEADER.unpack_from(self._mmap, 0)
+            self.word_bits = dict(zip(CAPITALIZE, bits))
+            self._offsets = HEADER.size
+        elif magic == MAGIC_V1:
+            _, self.count = HEADER_V1.unpack_from(self._mmap, 0)
+            self.word_bits = None
+            self._offsets = HEADER_V1.size
+        else:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a passphrase wordlist")
+        self._data_offset = self._offsets + 8 * (self.count + 1)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("word index out of range")
+        start, end = OFFSET.unpack_from(self._mmap, self._offsets + 8 * index)
+        return self._mmap[self._data_offset + start:self._data_offset + end].decode('utf-8')
+
+    def close(self):
+        self._mmap.close()
+
+
+class PassphraseGenerator:
+    """Passphrases of uniformly chosen words from a WordList"""
+
+    def __init__(self, wordlist):
+        if isinstance(wordlist, str):
+            wordlist = WordList(wordlist)
+        if not len(wordlist):
+            raise ValueError("Passphrase wordlist is empty")
+        self.wordlist = wordlist
+        # capitalize option -> entropy of one word token, from the file header when it has them
+        self._word_bits = dict(getattr(wordlist, 'word_bits', None) or {})
+
+    def generate(self, words=6, separator='-', capitalize='none', digits=0):
+        """Build a passphrase.
+
+        capitalize is 'none', 'first' (every word) or 'random' (each word
+        with probability 1/2); digits > 0 inserts a random number of that
+        many digits as an extra token at a random position.
+        """
+        if capitalize not in CAPITALIZE:
+            raise ValueError(f"capitalize must be one of {', '.join(CAPITALIZE)}")
+        tokens = [self.wordlist[secrets.randbelow(len(self.wordlist))] for _ in range(words)]
+        if capitalize == 'first':
+            tokens = [token.capitalize() for token in tokens]
+        elif capitalize == 'random':
+            tokens = [token.capitalize() if secrets.randbits(1) else token for token in tokens]
+        if digits:
+            number = ''.join(secrets.choice('0123456789') for _ in range(digits))
+            tokens.insert(secrets.randbelow(len(tokens) + 1), number)
+        return separator.join(tokens)
+
+    def word_bits(self, capitalize='none'):
+        """Bits of entropy of one word token (see word_bits()).
+
+        Read from the wordlist file's header; lists without them (files from
+        before the header held them, or other sequences of words) are counted
+        once, on first use.
+        """
+        if capitalize not in CAPITALIZE:
+            raise ValueError(f"capitalize must be one of {', '.join(CAPITALIZE)}")
+        bits = self._word_bits.get(capitalize)
+        if bits is None:
+            words = (self.wordlist[i] for i in range(len(self.wordlist)))
+            bits = self._word_bits[capitalize] = word_bits(words, capitalize)
+        return bits
+
+    def entropy(self, words=6, capitalize='none', digits=0):
+        """Bits of entropy of generate() with the same options"""
+        bits = words * self.word_bits(capitalize)
+        if digits:
+            bits += digits * math.log2(10) + math.log2(words + 1)
+        return bits
@@ -1,21 +1,169 @@
 # password_analyzer.py
-import re
-from datetime import datetime
+import numpy as np
+from password_scanner import PasswordScanner, SYMBOLS, LOWER, UPPER, DIGIT, SYMBOL
+from keyboard_patterns import STEP_TABLE, SECOND_SHIFT, DIGIT_SEQUENCES, LETTER_SEQUENCES, WALK_BITS
+from common_passwords import CommonPasswordIndex
+from breach_index import BreachIndex
+from dictionary_matcher import DictionaryMatcher
+from analysis_cache import AnalysisCache
+import config
+
+STRENGTH_LABELS = ("Very Weak", "Weak", "Medium", "Strong", "Very Strong")
+
+# Lookup tables shared by the batch kernels (indexed by length / variety count)
+LENGTH_POINTS = np.array([0] * 8 + [20] * 4 + [30] * 4 + [35], dtype=np.int16)
+VARIETY_POINTS = np.array([0, 0, 15, 25, 35], dtype=np.int16)
+STRENGTH_THRESHOLDS = np.array([20, 40, 60, 80], dtype=np.int16)
+
+# Character class bits (shared with PasswordScanner) as a uint8 lookup table
+CLASS_TABLE = np.zeros(256, dtype=np.uint8)
+CLASS_TABLE[ord('a'):ord('z') + 1] = LOWER
+CLASS_TABLE[ord('A'):ord('Z') + 1] = UPPER
+CLASS_TABLE[ord('0'):ord('9') + 1] = DIGIT
+CLASS_TABLE[np.frombuffer(SYMBOLS.encode('ascii'), dtype=np.uint8)] = SYMBOL
+POPCOUNT = np.array([bin(i).count('1') for i in range(16)], dtype=np.int16)
+LOWERCASE_TABLE = np.arange(256, dtype=np.uint8)
+LOWERCASE_TABLE[ord('A'):ord('Z') + 1] += 32
+
+# Sequence and keyboard-walk bits for every pair of ASCII characters
+PAIR_STEPS = np.zeros((128, 128), dtype=np.uint32)
+for (a, b), bits in STEP_TABLE.items():
+    PAIR_STEPS[ord(a), ord(b)] = bits
+
+# Maximum points lost when every character lies inside dictionary words
+DICTIONARY_PENALTY = 20
+
+# Rows wider than this (or non-ASCII rows) are scored by analyze_password
+BATCH_MAX_WIDTH = 128
+
+def dictionary_penalty(covered, length):
+    """DICTIONARY_PENALTY scaled by the covered fraction, rounded half up (scalars or arrays)"""
+    return (2 * DICTIONARY_PENALTY * covered + length) // (2 * length)
 
 class PasswordAnalyzer:
-    def __init__(self):
-        self.common_passwords = [
+    def __init__(self, common_index=None, breach_index=None, dictionary=None, cache=None):
+        self.scanner = PasswordScanner()
+        self.ruleset_version = 0
+        self._cache_key = None
+        self.common_passwords = {
             "password", "123456", "password123", "admin", "qwerty",
             "letmein", "welcome", "monkey", "dragon", "master"
-        ]
+        }
+        
+        # Optional corpora (objects or paths to them), defaulting to the configured files
+        self.common_index = common_index if common_index is not None else config.COMMON_PASSWORDS_INDEX
+        self.breach_index = breach_index if breach_index is not None else config.BREACH_INDEX
+        self.dictionary = dictionary if dictionary is not None else config.DICTIONARY
+        
+        # Optional result cache in front of analyze_password
+        if cache is None and config.ANALYSIS_CACHE_SIZE:
+            cache = AnalysisCache(config.ANALYSIS_CACHE_SIZE, config.ANALYSIS_CACHE_TTL)
+        self.cache = cache
+    
+    # Rule set and corpora: every change bumps ruleset_version and the cache key
+    def _rules_changed(self):
+        self.ruleset_version += 1
+        self._cache_key = None
+    
+    @property
+    def cache_key(self):
+        """What a cached result depends on: the analyzer class, common-password list and corpus files"""
+        if self._cache_key is None:
+            corpora = (self._common_index, self._breach_index, self._dictionary)
+            self._cache_key = (type(self), self._common_passwords,
+                               *(getattr(corpus, 'identity', corpus) for corpus in corpora))
+        return self._cache_key
+    
+    @property
+    def common_passwords(self):
+        return self._common_passwords
+    
+    @common_passwords.setter
+    def common_passwords(self, passwords):
+        self._common_passwords = frozenset(passwords)
+        self._rules_changed()
+    
+    @property
+    def common_index(self):
+        return self._common_index
+    
+    @common_index.setter
+    def common_index(self, index):
+        if isinstance(index, str):
+            index = CommonPasswordIndex(index)
+        self._common_index = index
+        self._rules_changed()
+    
+    @property
+    def breach_index(self):
+        return self._breach_index
+    
+    @breach_index.setter
+    def breach_index(self, index):
+        if isinstance(index, str):
+            index = BreachIndex(index)
+        self._breach_index = index
+        self._rules_changed()
+    
+    @property
+    def dictionary(self):
+        return self._dictionary
+    
+    @dictionary.setter
+    def dictionary(self, dictionary):
+        if isinstance(dictionary, str):
+            dictionary = DictionaryMatcher(dictionary)
+        self._dictionary = dictionary
+        self._rules_changed()
+    
+    def is_common_password(self, lowered):
+        """Check a lowercased password against the built-in list and the corpus index"""
+        if lowered in self.common_passwords:
+            return True
+        return self.common_index is not None and lowered in self.common_index
+    
+    def breach_count(self, password):
+        """How often the exact password appears in the breach index (0 without one)"""
+        if self.breach_index is None:
+            return 0
+        return self.breach_index.lookup(password)
+    
+    def dictionary_coverage(self, lowered):
+        """Characters inside embedded dictionary words, or None without a dictionary"""
+        if self.dictionary is None:
+            return None
+        return self.dictionary.coverage(lowered)
     
     def analyze_password(self, password):
         """Comprehensive password analysis"""
+        if self.cache is None:
+            return self._analyze(password)
+        
+        rules = self.cache_key
+        analysis = self.cache.get(password, rules)
+        if analysis is None:
+            analysis = self._analyze(password)
+            self.cache.put(password, analysis, rules)
+        # Callers get their own copy so the cached result cannot be modified
+        return dict(analysis, feedback=list(analysis['feedback']))
+    
+    def _analyze(self, password):
+        signals = self.scanner.scan(password)
+        return self.score_signals(
+            signals, self.breach_count(password), self.dictionary_coverage(signals.lowered)
+        )
+    
+    def score_signals(self, signals, breach_count=0, dictionary_coverage=None, common=None):
+        """Score the signals collected by PasswordScanner.
+
+        common may be passed by callers that already know the common-password
+        result; otherwise it is looked up from signals.lowered.
+        """
         score = 0
         feedback = []
         
         # Length scoring
-        length = len(password)
+        length = signals.length
         if length >= 16:
             score += 35
             feedback.append("Excellent length (16+ characters)")
@@ -29,12 +177,7 @@ class PasswordAnalyzer:
             feedback.append("Too short - use at least 8 characters")
         
         # Character variety
-        has_lower = bool(re.search(r'[a-z]', password))
-        has_upper = bool(re.search(r'[A-Z]', password))
-        has_digit = bool(re.search(r'\d', password))
-        has_symbol = bool(re.search(r'[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]', password))
-        
-        variety_count = sum([has_lower, has_upper, has_digit, has_symbol])
+        variety_count = signals.has_lower + signals.has_upper + signals.has_digit + signals.has_symbol
         
         if variety_count == 4:
             score += 35
@@ -49,27 +192,43 @@ class PasswordAnalyzer:
             feedback.append("Poor character variety - mix letters, numbers, symbols")
         
         # Pattern detection
-        if re.search(r'(.)\1{2,}', password):
+        if signals.repeats:
             score -= 10
             feedback.append("Avoid repeating characters")
         
-        if re.search(r'(012|123|234|345|456|567|678|789|890)', password):
+        if signals.sequential_numbers:
             score -= 15
             feedback.append("Avoid sequential numbers")
         
-        if re.search(r'(abc|bcd|cde|def|efg|fgh|ghi|hij|ijk|jkl|klm|lmn|mno|nop|opq|pqr|qrs|rst|stu|tuv|uvw|vwx|wxy|xyz)', password.lower()):
+        if signals.sequential_letters:
             score -= 15
             feedback.append("Avoid sequential letters")
         
+        if signals.keyboard_walk:
+            score -= 15
+            feedback.append("Avoid keyboard patterns like 'qwerty'")
+        
         # Common password check
-        if password.lower() in self.common_passwords:
+        if common is None:
+            common = self.is_common_password(signals.lowered)
+        if common:
             score -= 30
             feedback.append("This is a commonly used password")
         
-        # Dictionary word check (simplified)
-        if len(password) > 4 and password.lower().isalpha():
-            score -= 10
-            feedback.append("Avoid using dictionary words")
+        # Dictionary word check: penalise by how much of the password is made of words
+        if dictionary_coverage is None:
+            if length > 4 and signals.all_alpha:
+                score -= 10
+                feedback.append("Avoid using dictionary words")
+        elif dictionary_coverage and length:
+            covered = min(dictionary_coverage, length)
+            score -= dictionary_penalty(covered, length)
+            feedback.append(f"Avoid using dictionary words ({covered} of {length} characters)")
+        
+        # Known breach check
+        if breach_count:
+            score -= 30
+            feedback.append(f"Found in known data breaches ({breach_count:,} times)")
         
         # Ensure score is within bounds
         score = max(0, min(100, score))
@@ -91,10 +250,126 @@ class PasswordAnalyzer:
             'strength': strength,
             'feedback': feedback,
             'length': length,
-            'has_lower': has_lower,
-            'has_upper': has_upper,
-            'has_digit': has_digit,
-            'has_symbol': has_symbol
+            'has_lower': signals.has_lower,
+            'has_upper': signals.has_upper,
+            'has_digit': signals.has_digit,
+            'has_symbol': signals.has_symbol,
+            'breach_count': breach_count
+        }
+    
+    def analyze_many(self, passwords, chunk_size=65536):
+        """Analyze a batch of passwords with vectorized kernels.
+
+        Returns a dict of columns (numpy arrays) with one entry per password:
+        score, strength, length, has_lower, has_upper, has_digit, has_symbol,
+        breach_count.
+        Every row matches what analyze_password returns for that password.
+        """
+        passwords = list(passwords)
+        count = len(passwords)
+        columns = {
+            'score': np.zeros(count, dtype=np.int16),
+            'strength': np.empty(count, dtype=object),
+            'length': np.zeros(count, dtype=np.int32),
+            'has_lower': np.zeros(count, dtype=bool),
+            'has_upper': np.zeros(count, dtype=bool),
+            'has_digit': np.zeros(count, dtype=bool),
+            'has_symbol': np.zeros(count, dtype=bool),
+            'breach_count': np.zeros(count, dtype=np.uint32)
+        }
+        pending = np.ones(count, dtype=bool)
+        
+        for start in range(0, count, chunk_size):
+            chunk = passwords[start:start + chunk_size]
+            rows = np.arange(start, start + len(chunk))
+            length = np.fromiter(map(len, chunk), dtype=np.int32, count=len(chunk))
+            short = length <= BATCH_MAX_WIDTH
+            if not short.all():
+                chunk = [p for p, keep in zip(chunk, short) if keep]
+                rows, length = rows[short], length[short]
+            
+            # Pack as UCS-4 code points, then keep rows that are plain ASCII with no NULs
+            width = max(int(length.max(initial=0)), 3)
+            codes = np.array(chunk, dtype=f'U{width}').view(np.uint32).reshape(len(chunk), width)
+            fast = (codes < 128).all(axis=1) & (np.count_nonzero(codes, axis=1) == length)
+            
+            result = self._analyze_chunk(
+                [chunk[i] for i in np.flatnonzero(fast)], codes[fast].astype(np.uint8), length[fast]
+            )
+            for key, values in result.items():
+                columns[key][rows[fast]] = values
+            pending[rows[fast]] = False
+        
+        # Non-ASCII, NUL-containing and very long passwords take the per-call path
+        for i in np.flatnonzero(pending):
+            analysis = self.analyze_password(passwords[i])
+            for key, values in columns.items():
+                values[i] = analysis[key]
+        
+        return columns
+
+    def _analyze_chunk(self, passwords, chars, length):
+        """Score ASCII passwords packed into a zero-padded uint8 array"""
+        width = chars.shape[1]
+        
+        # Character classes
+        classes = CLASS_TABLE[chars]
+        mask = np.bitwise_or.reduce(classes, axis=1)
+        variety = POPCOUNT[mask]
+        letters = (classes & (LOWER | UPPER)) != 0
+        
+        # Runs of three identical characters ('.' never matches a newline)
+        same = (chars[:, 1:] == chars[:, :-1]) & (chars[:, :-1] != 0) & (chars[:, :-1] != 10)
+        repeats = (same[:, :-1] & same[:, 1:]).any(axis=1)
+        
+        # Sequences end on two steps of one kind, walks on three in one direction
+        steps = PAIR_STEPS[chars[:, :-1], chars[:, 1:]]
+        sequences = steps[:, :-1] & (steps[:, 1:] >> SECOND_SHIFT)
+        sequential_numbers = (sequences & DIGIT_SEQUENCES).any(axis=1)
+        sequential_letters = (sequences & LETTER_SEQUENCES).any(axis=1)
+        keyboard_walk = (steps[:, :-2] & steps[:, 1:-1] & steps[:, 2:] & WALK_BITS).any(axis=1)
+        
+        lowered = LOWERCASE_TABLE[chars]
+        
+        # Common passwords, compared on the lowercased packed rows
+        common_packed = np.array(
+            [p.encode('ascii') for p in self.common_passwords if p.isascii() and len(p) <= width],
+            dtype=f'S{width}'
+        )
+        common = np.isin(lowered.view(f'S{width}').ravel(), common_packed)
+        if self.common_index is not None:
+            common |= self.common_index.contains_many([p.lower() for p in passwords])
+        
+        if self.dictionary is None:
+            dictionary_points = 10 * ((length > 4) & (np.count_nonzero(letters, axis=1) == length))
+        else:
+            covered = self.dictionary.coverage_many(lowered)
+            dictionary_points = dictionary_penalty(covered, np.maximum(length, 1))
+        
+        if self.breach_index is not None:
+            breach_count = self.breach_index.lookup_many(passwords)
+        else:
+            breach_count = np.zeros(len(passwords), dtype=np.uint32)
+        
+        score = (
+            LENGTH_POINTS[np.minimum(length, 16)] + VARIETY_POINTS[variety]
+            - 10 * repeats - 15 * sequential_numbers - 15 * sequential_letters - 15 * keyboard_walk
+            - 30 * common - dictionary_points - 30 * (breach_count > 0)
+        )
+        score = np.clip(score, 0, 100).astype(np.int16)
+        strength = np.array(STRENGTH_LABELS, dtype=object)[
+            np.searchsorted(STRENGTH_THRESHOLDS, score, side='right')
+        ]
+        
+        return {
+            'score': score,
+            'strength': strength,
+            'length': length,
+            'has_lower': (mask & LOWER) != 0,
+            'has_upper': (mask & UPPER) != 0,
+            'has_digit': (mask & DIGIT) != 0,
+            'has_symbol': (mask & SYMBOL) != 0,
+            'breach_count': breach_count
         }
     
     def get_improvement_suggestions(self, analysis):
@@ -115,6 +390,9 @@ class PasswordAnalyzer:
         if not analysis['has_symbol']:
             suggestions.append("Add special characters (!@#$%^&*)")
         
+        if analysis['breach_count']:
+            suggestions.append("Never reuse a password that has appeared in a data breach")
+        
         if analysis['score'] < 60:
             suggestions.append("Consider using a password generator for better security")
         
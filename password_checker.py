@@ -1,210 +1,340 @@
 # password_checker.py
 import bcrypt
+import threading
 from database import SessionLocal
-from models import User, PasswordTest, Breach
+from models import User, PasswordTest, Breach, UserSummary, STRONG_SCORE
 from password_analyzer import PasswordAnalyzer
 from password_generator import PasswordGenerator
+from passphrase import PassphraseGenerator
+from records import BreachRecord, TestRecord, UserRecord
+from user_cache import USER_IDS
+from user_summary import add_to_summary
 from utils import with_loading
-from sqlalchemy.orm import joinedload
+from write_behind import PendingTest, WriteBehindRecorder
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import scoped_session, selectinload, undefer_group
 import json
 from datetime import datetime
+import config
+
+# Rows per page for keyset-paginated listings, and per fetch for streaming ones
+PAGE_SIZE = 20
+STREAM_BATCH = 1000
 
 class PasswordService:
-    def __init__(self):
+    """Users, password tests, generation and breaches on top of the database.
+    
+    Thread safety: one PasswordService may be shared by any number of threads
+    once it is constructed. Each call works in its own thread's session (a
+    scoped_session, removed when the call returns), and the shared parts are
+    read-only or locked: the user id cache, the analyzer's result cache and the
+    write-behind recorder. Results are immutable records (records.py) or fresh
+    dicts and lists owned by the caller, so they can be passed between threads.
+    
+    Not covered: changing the analyzer's corpora or cache settings while other
+    threads are calling in, and consuming one iter_* stream from two threads
+    at once. Loading spinners only run for calls made on the main thread.
+    """
+    
+    def __init__(self, recorder=None, session_factory=SessionLocal):
         self.analyzer = PasswordAnalyzer()
         self.generator = PasswordGenerator()
+        self._passphrases = None
+        self._passphrases_lock = threading.Lock()
+        
+        # One session per thread; every method removes it again before returning
+        self.sessions = scoped_session(session_factory)
+        
+        # Optional write-behind recording of tests and generations (see write_behind.py)
+        if recorder is None and config.WRITE_BEHIND_BATCH:
+            recorder = WriteBehindRecorder(config.WRITE_BEHIND_BATCH, config.WRITE_BEHIND_DELAY)
+        self.recorder = recorder
+        self.user_ids = USER_IDS
+    
+    @property
+    def passphrases(self):
+        """Passphrase generator over the configured wordlist, opened on first use"""
+        if self._passphrases is None:
+            with self._passphrases_lock:
+                if self._passphrases is None:
+                    if not config.WORDLIST:
+                        raise ValueError("No passphrase wordlist configured (set PASSWORD_CHECKER_WORDLIST)")
+                    self._passphrases = PassphraseGenerator(config.WORDLIST)
+        return self._passphrases
+    
+    def flush(self):
+        """Commit any write-behind records; reads call this so they see every recorded test"""
+        if self.recorder:
+            self.recorder.flush()
+    
+    def _user_id(self, session, username):
+        """Id of username from the shared cache, queried (and cached) on a miss"""
+        user_id = self.user_ids.get(username)
+        if user_id is None:
+            user_id = session.query(User.id).filter(User.username == username).scalar()
+            if user_id is None:
+                raise ValueError(f"User '{username}' not found")
+            self.user_ids.set(username, user_id)
+        return user_id
+    
+    def _record_test(self, session, user_id, score, is_generated):
+        """Store a PasswordTest now, or queue it when write-behind recording is on"""
+        if self.recorder:
+            return self.recorder.record(user_id, score, is_generated)
+        test = PasswordTest(user_id=user_id, score=score, is_generated=is_generated)
+        session.add(test)
+        add_to_summary(session, user_id, tests=int(not is_generated), generated=int(is_generated),
+                       score_sum=score, strong=int(score >= STRONG_SCORE))
+        session.commit()
+        return test
+
+    @staticmethod
+    def _test_ids(test):
+        """Result keys for a recorded test: test_id, plus pending_test for a write-behind record.
+
+        test_id is None until a pending record's batch commits; its
+        pending_test.wait() blocks until then and returns the id.
+        """
+        if isinstance(test, PendingTest):
+            return {'test_id': test.id, 'pending_test': test}
+        return {'test_id': test.id, 'pending_test': None}
 
     # User management
     @with_loading("Creating user")
-    def create_user(self, username: str, password: str) -> User:
-        session = SessionLocal()
+    def create_user(self, username: str, password: str) -> UserRecord:
+        session = self.sessions()
         try:
-            exists = session.query(User).filter(User.username == username).first()
+            exists = session.query(User.id).filter(User.username == username).first()
             if exists:
                 raise ValueError(f"User '{username}' already exists")
             user = User(username=username)
             user.set_password(password)
             session.add(user)
-            session.commit()
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another thread or process created the same username since the check above
+                session.rollback()
+                raise ValueError(f"User '{username}' already exists")
             session.refresh(user)
             
             # Add sample breach for new user
             sample_breach = Breach(user_id=user.id, breach_name="New User Security Check", severity="Low")
             session.add(sample_breach)
+            add_to_summary(session, user.id, breaches=1)
             session.commit()
+            self.user_ids.set(username, user.id)
             
-            return user
+            return UserRecord(user.id, username, 0, 0, 1, 0)
         finally:
-            session.close()
+            self.sessions.remove()
 
-    def authenticate_user(self, username: str, password: str):
-        session = SessionLocal()
+    @with_loading("Deleting user")
+    def delete_user(self, username: str):
+        """Delete a user with their tests and breaches"""
+        self.flush()
+        session = self.sessions()
         try:
             user = session.query(User).filter(User.username == username).first()
+            if not user:
+                raise ValueError(f"User '{username}' not found")
+            session.delete(user)
+            session.commit()
+        finally:
+            self.sessions.remove()
+            self.user_ids.invalidate(username)
+
+    def authenticate_user(self, username: str, password: str):
+        session = self.sessions()
+        try:
+            user = session.query(User).options(undefer_group('stats')).filter(User.username == username).first()
             if user and user.check_password(password):
-                return user
+                return UserRecord.from_user(user)
             return None
         finally:
-            session.close()
+            self.sessions.remove()
     
     def get_user(self, username: str):
-        session = SessionLocal()
+        session = self.sessions()
         try:
-            return session.query(User).filter(User.username == username).first()
+            user = session.query(User).options(undefer_group('stats')).filter(User.username == username).first()
+            return UserRecord.from_user(user) if user else None
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_all_users(self):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
-            users = session.query(User).options(
-                joinedload(User.password_tests),
-                joinedload(User.breaches)
-            ).all()
-            for user in users:
-                session.expunge(user)
-            return users
+            return [UserRecord.from_user(user) for user in session.query(User).options(undefer_group('stats'))]
         finally:
-            session.close()
+            self.sessions.remove()
 
     # Password testing
     @with_loading("Analyzing password")
     def test_password(self, username: str, password: str) -> dict:
-        session = SessionLocal()
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            user_id = self._user_id(session, username)
             
             # Analyze password
             analysis = self.analyzer.analyze_password(password)
             
             # Store test result
-            test = PasswordTest(
-                user_id=user.id,
-                score=analysis['score'],
-                is_generated=False
-            )
-            session.add(test)
-            session.commit()
-            session.refresh(test)
+            test = self._record_test(session, user_id, analysis['score'], is_generated=False)
             
             return {
-                'test_id': test.id,
+                **self._test_ids(test),
                 'analysis': analysis,
+                'breach_count': analysis['breach_count'],
                 'suggestions': self.analyzer.get_improvement_suggestions(analysis)
             }
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_test_history(self, username: str):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            user_id = self._user_id(session, username)
             tests = session.query(PasswordTest).options(
-                joinedload(PasswordTest.breaches)
-            ).filter(PasswordTest.user_id == user.id).all()
-            
-            # Detach from session to avoid lazy loading issues
-            for test in tests:
-                session.expunge(test)
-            return tests
+                selectinload(PasswordTest.breaches)
+            ).filter(PasswordTest.user_id == user_id).all()
+            return [TestRecord.with_breaches(test) for test in tests]
         finally:
-            session.close()
+            self.sessions.remove()
 
     # Password generation
     @with_loading("Generating secure password")
-    def generate_password(self, username: str, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
-        session = SessionLocal()
+    def generate_password(self, username: str, length=12, use_uppercase=True, use_digits=True, use_symbols=True,
+                          words=None, separator="-"):
+        """Generate and record a password, or a passphrase of `words` words when given.
+
+        For passphrases use_uppercase capitalises each word and use_digits
+        inserts one random digit; length and use_symbols do not apply.
+        """
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            user_id = self._user_id(session, username)
             
             # Generate password
-            password = self.generator.generate_password(length, use_uppercase, use_digits, use_symbols)
+            if words:
+                capitalize = 'first' if use_uppercase else 'none'
+                digits = 1 if use_digits else 0
+                password = self.passphrases.generate(words, separator, capitalize, digits)
+                entropy = self.passphrases.entropy(words, capitalize, digits)
+            else:
+                password = self.generator.generate_password(length, use_uppercase, use_digits, use_symbols)
+                entropy = self.generator.entropy(length, use_uppercase, use_digits, use_symbols)
             analysis = self.analyzer.analyze_password(password)
             
             # Store generation record as a password test
-            test = PasswordTest(
-                user_id=user.id,
-                score=analysis['score'],
-                is_generated=True
-            )
-            session.add(test)
-            session.commit()
+            test = self._record_test(session, user_id, analysis['score'], is_generated=True)
             
             return {
                 'password': password,
                 'analysis': analysis,
-                'test_id': test.id
+                'entropy': entropy,
+                **self._test_ids(test)
             }
         finally:
-            session.close()
+            self.sessions.remove()
+
+    def record_generated_passwords(self, username: str, passwords):
+        """Score and store a batch of generated passwords in one transaction"""
+        session = self.sessions()
+        try:
+            user_id = self._user_id(session, username)
+            
+            scores = self.analyzer.analyze_many(passwords)['score'].tolist()
+            session.bulk_insert_mappings(PasswordTest, [
+                {'user_id': user_id, 'score': score, 'is_generated': True} for score in scores
+            ])
+            self._add_generated_to_summary(session, user_id, scores)
+            session.commit()
+            return len(scores)
+        finally:
+            self.sessions.remove()
+
+    def _add_generated_to_summary(self, session, user_id, scores):
+        add_to_summary(session, user_id, generated=len(scores), score_sum=sum(scores),
+                       strong=sum(score >= STRONG_SCORE for score in scores))
 
+    @with_loading("Generating secure passwords")
     def generate_multiple_passwords(self, username: str, count=5, length=12):
-        passwords = []
-        for _ in range(count):
-            result = self.generate_password(username, length)
-            passwords.append(result)
-        return passwords
+        """Generate and record count passwords with one user lookup and one bulk insert.
+        
+        Results match generate_password's apart from test_id, which a bulk
+        insert does not report back.
+        """
+        session = self.sessions()
+        try:
+            user_id = self._user_id(session, username)
+            
+            passwords = self.generator.generate_bulk(count, length)
+            entropy = self.generator.entropy(length)
+            results = [
+                {'password': password, 'analysis': self.analyzer.analyze_password(password), 'entropy': entropy}
+                for password in passwords
+            ]
+            scores = [result['analysis']['score'] for result in results]
+            session.bulk_insert_mappings(PasswordTest, [
+                {'user_id': user_id, 'score': score, 'is_generated': True} for score in scores
+            ])
+            self._add_generated_to_summary(session, user_id, scores)
+            session.commit()
+            return results
+        finally:
+            self.sessions.remove()
 
     def get_generation_history(self, username: str):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
-            return session.query(PasswordTest).filter(
-                PasswordTest.user_id == user.id,
+            user_id = self._user_id(session, username)
+            tests = session.query(PasswordTest).filter(
+                PasswordTest.user_id == user_id,
                 PasswordTest.is_generated == True
             ).all()
+            return [TestRecord.from_test(test) for test in tests]
         finally:
-            session.close()
+            self.sessions.remove()
 
     # Breach management
     @with_loading("Creating breach record")
     def create_breach(self, username: str, breach_name: str, breach_date: datetime, severity: str, description: str = None):
-        session = SessionLocal()
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            user_id = self._user_id(session, username)
             
             breach = Breach(
-                user_id=user.id,
+                user_id=user_id,
                 breach_name=breach_name,
                 severity=severity
             )
             session.add(breach)
+            add_to_summary(session, user_id, breaches=1)
             session.commit()
-            session.refresh(breach)
-            return breach
+            return BreachRecord(breach.id, user_id, breach_name, severity, ())
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_user_breaches(self, username: str):
-        session = SessionLocal()
+        session = self.sessions()
         try:
-            user = session.query(User).filter(User.username == username).first()
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            user_id = self._user_id(session, username)
             breaches = session.query(Breach).options(
-                joinedload(Breach.affected_passwords)
-            ).filter(Breach.user_id == user.id).all()
-            
-            # Detach from session to avoid lazy loading issues
-            for breach in breaches:
-                session.expunge(breach)
-            return breaches
+                selectinload(Breach.affected_passwords)
+            ).filter(Breach.user_id == user_id).all()
+            return [BreachRecord.from_breach(breach) for breach in breaches]
         finally:
-            session.close()
+            self.sessions.remove()
 
     @with_loading("Associating password with breach")
     def associate_password_with_breach(self, breach_id: int, password_test_id: int):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
             breach = session.query(Breach).filter(Breach.id == breach_id).first()
             password_test = session.query(PasswordTest).filter(PasswordTest.id == password_test_id).first()
@@ -216,70 +346,164 @@ class PasswordService:
             
             breach.add_affected_password(password_test)
             session.commit()
-            return breach
+            return BreachRecord.from_breach(breach)
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_breach_affected_passwords(self, breach_id: int):
-        session = SessionLocal()
+        session = self.sessions()
         try:
             breach = session.query(Breach).options(
-                joinedload(Breach.affected_passwords)
+                selectinload(Breach.affected_passwords)
             ).filter(Breach.id == breach_id).first()
             
             if not breach:
                 raise ValueError(f"Breach {breach_id} not found")
             
-            return breach.affected_passwords
+            return [TestRecord.from_test(test) for test in breach.affected_passwords]
         finally:
-            session.close()
+            self.sessions.remove()
 
     # Statistics and analytics
     def get_user_stats(self, username: str):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
-            user = session.query(User).options(
-                joinedload(User.password_tests),
-                joinedload(User.breaches)
-            ).filter(User.username == username).first()
+            user_id = self._user_id(session, username)
             
-            if not user:
-                raise ValueError(f"User '{username}' not found")
+            summary = session.get(UserSummary, user_id) or UserSummary(
+                test_count=0, generated_count=0, score_sum=0, strong_count=0, breach_count=0
+            )
             
-            avg_score = user.get_average_test_score()
-            strong_passwords = len([t for t in user.password_tests if t.is_strong])
-            generated_count = len([t for t in user.password_tests if t.is_generated])
-            tested_count = len([t for t in user.password_tests if not t.is_generated])
+            return {
+                'username': username,
+                'tests_performed': summary.test_count,
+                'passwords_generated': summary.generated_count,
+                'average_score': round(summary.average_score, 2),
+                'strong_passwords': summary.strong_count,
+                'breach_count': summary.breach_count,
+                'total_breaches': summary.breach_count
+            }
+        finally:
+            self.sessions.remove()
+
+    def get_system_overview(self, weak_threshold=40):
+        """System-wide counts for the overview dashboard, in one aggregate query"""
+        self.flush()
+        session = self.sessions()
+        try:
+            def total(column):
+                return select(func.coalesce(func.sum(column), 0)).scalar_subquery()
             
+            users, tests, generated, breaches, weak_tests = session.query(
+                select(func.count(User.id)).scalar_subquery(),
+                total(UserSummary.test_count),
+                total(UserSummary.generated_count),
+                total(UserSummary.breach_count),
+                select(func.count(PasswordTest.id)).where(PasswordTest.score < weak_threshold).scalar_subquery()
+            ).one()
             return {
-                'username': user.username,
-                'tests_performed': tested_count,
-                'passwords_generated': generated_count,
-                'average_score': round(avg_score, 2),
-                'strong_passwords': strong_passwords,
-                'breach_count': user.breach_count,
-                'total_breaches': len(user.breaches)
+                'users': users,
+                'tests': tests,
+                'generated': generated,
+                'weak_tests': weak_tests,
+                'breaches': breaches
             }
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_weak_tests(self, threshold=40):
-        session = SessionLocal()
+        self.flush()
+        session = self.sessions()
         try:
-            return session.query(PasswordTest).filter(PasswordTest.score < threshold).all()
+            tests = session.query(PasswordTest).filter(PasswordTest.score < threshold).all()
+            return [TestRecord.from_test(test) for test in tests]
         finally:
-            session.close()
+            self.sessions.remove()
 
     def get_all_breaches(self):
-        session = SessionLocal()
+        session = self.sessions()
         try:
             breaches = session.query(Breach).options(
-                joinedload(Breach.affected_passwords)
+                selectinload(Breach.affected_passwords)
             ).all()
-            
-            # Detach from session to avoid lazy loading issues
-            for breach in breaches:
-                session.expunge(breach)
-            return breaches
+            return [BreachRecord.from_breach(breach) for breach in breaches]
         finally:
-            session.close()
\ No newline at end of file
+            self.sessions.remove()
+
+    # Paginated and streaming listings
+    # Pages use a keyset cursor (rows with id above after_id, by id), so every page
+    # costs the same however deep it is; streams fetch batch_size rows at a time.
+    def _page(self, build_query, to_record, after_id, limit, *args):
+        self.flush()
+        session = self.sessions()
+        try:
+            query = build_query(session, *args)
+            model = query.column_descriptions[0]['entity']
+            if after_id is not None:
+                query = query.filter(model.id > after_id)
+            return [to_record(row) for row in query.order_by(model.id).limit(limit)]
+        finally:
+            self.sessions.remove()
+
+    def _stream(self, build_query, to_record, batch_size, *args):
+        self.flush()
+        # Not the thread's scoped session: the stream stays open between calls
+        session = self.sessions.session_factory()
+        try:
+            query = build_query(session, *args)
+            model = query.column_descriptions[0]['entity']
+            for row in query.order_by(model.id).yield_per(batch_size):
+                yield to_record(row)
+        finally:
+            session.close()
+
+    def _test_history_query(self, session, username):
+        return session.query(PasswordTest).options(selectinload(PasswordTest.breaches)).filter(
+            PasswordTest.user_id == self._user_id(session, username)
+        )
+
+    def _generation_history_query(self, session, username):
+        return session.query(PasswordTest).filter(
+            PasswordTest.user_id == self._user_id(session, username),
+            PasswordTest.is_generated == True
+        )
+
+    def _weak_tests_query(self, session, threshold):
+        return session.query(PasswordTest).filter(PasswordTest.score < threshold)
+
+    def _users_query(self, session):
+        return session.query(User).options(undefer_group('stats'))
+
+    def _breaches_query(self, session):
+        return session.query(Breach).options(selectinload(Breach.affected_passwords))
+
+    def get_test_history_page(self, username: str, after_id=None, limit=PAGE_SIZE):
+        return self._page(self._test_history_query, TestRecord.with_breaches, after_id, limit, username)
+
+    def iter_test_history(self, username: str, batch_size=STREAM_BATCH):
+        return self._stream(self._test_history_query, TestRecord.with_breaches, batch_size, username)
+
+    def get_generation_history_page(self, username: str, after_id=None, limit=PAGE_SIZE):
+        return self._page(self._generation_history_query, TestRecord.from_test, after_id, limit, username)
+
+    def iter_generation_history(self, username: str, batch_size=STREAM_BATCH):
+        return self._stream(self._generation_history_query, TestRecord.from_test, batch_size, username)
+
+    def get_weak_tests_page(self, threshold=40, after_id=None, limit=PAGE_SIZE):
+        return self._page(self._weak_tests_query, TestRecord.from_test, after_id, limit, threshold)
+
+    def iter_weak_tests(self, threshold=40, batch_size=STREAM_BATCH):
+        return self._stream(self._weak_tests_query, TestRecord.from_test, batch_size, threshold)
+
+    def get_users_page(self, after_id=None, limit=PAGE_SIZE):
+        return self._page(self._users_query, UserRecord.from_user, after_id, limit)
+
+    def iter_users(self, batch_size=STREAM_BATCH):
+        return self._stream(self._users_query, UserRecord.from_user, batch_size)
+
+    def get_breaches_page(self, after_id=None, limit=PAGE_SIZE):
+        return self._page(self._breaches_query, BreachRecord.from_breach, after_id, limit)
+
+    def iter_breaches(self, batch_size=STREAM_BATCH):
+        return self._stream(self._breaches_query, BreachRecord.from_breach, batch_size)
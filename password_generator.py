@@ -1,6 +1,30 @@
 # password_generator.py
-import random
+import math
+import os
+import secrets
 import string
+import numpy as np
+
+# Passwords generated per batch in bulk and streaming generation (bounds memory)
+BULK_BATCH = 65536
+
+def random_indices(n, size):
+    """size unbiased random integers in [0, n) drawn from os.urandom (n <= 256).
+    
+    Bytes at or above the largest multiple of n are rejected rather than
+    folded back with a modulo, so every index is equally likely.
+    """
+    limit = 256 - 256 % n
+    out = np.empty(size, dtype=np.uint8)
+    filled = 0
+    while filled < size:
+        # Draw enough that one round almost always suffices
+        need = size - filled
+        draw = np.frombuffer(os.urandom(need * 256 // limit + 64), dtype=np.uint8)
+        draw = draw[draw < limit][:need]
+        out[filled:filled + len(draw)] = draw % n
+        filled += len(draw)
+    return out
 
 class PasswordGenerator:
     def __init__(self):
@@ -8,39 +32,83 @@ class PasswordGenerator:
         self.uppercase = string.ascii_uppercase
         self.digits = string.digits
         self.symbols = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+        self.random = secrets.SystemRandom()
     
-    def generate_password(self, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
-        """Generate a secure password with specified criteria"""
-        chars = self.lowercase
-        
+    def character_sets(self, use_uppercase=True, use_digits=True, use_symbols=True):
+        """Full alphabet and the classes every password must contain"""
+        required = [self.lowercase]
         if use_uppercase:
-            chars += self.uppercase
+            required.append(self.uppercase)
         if use_digits:
-            chars += self.digits
+            required.append(self.digits)
         if use_symbols:
-            chars += self.symbols
+            required.append(self.symbols)
+        return ''.join(required), required
+    
+    def entropy(self, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
+        """Approximate bits of entropy of a generated password (length x log2 of the alphabet)"""
+        chars, required = self.character_sets(use_uppercase, use_digits, use_symbols)
+        return max(length, len(required)) * math.log2(len(chars))
+    
+    def generate_password(self, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
+        """Generate a secure password with specified criteria"""
+        chars, required = self.character_sets(use_uppercase, use_digits, use_symbols)
         
         # Ensure at least one character from each selected type
-        password = [random.choice(self.lowercase)]
-        
-        if use_uppercase:
-            password.append(random.choice(self.uppercase))
-        if use_digits:
-            password.append(random.choice(self.digits))
-        if use_symbols:
-            password.append(random.choice(self.symbols))
+        password = [secrets.choice(charset) for charset in required]
         
         # Fill remaining length with random characters
         for _ in range(length - len(password)):
-            password.append(random.choice(chars))
+            password.append(secrets.choice(chars))
         
         # Shuffle the password
-        random.shuffle(password)
+        self.random.shuffle(password)
         return ''.join(password)
     
+    def generate_bulk(self, count, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
+        """Generate count passwords at once from os.urandom buffers.
+        
+        Same rules as generate_password (one character from each selected
+        class, the rest from the full alphabet, then shuffled), done on
+        whole arrays of passwords instead of one character at a time.
+        """
+        return [password
+                for batch in self.generate_batches(count, length, use_uppercase, use_digits, use_symbols)
+                for password in batch]
+    
+    def generate_batches(self, count, length=12, use_uppercase=True, use_digits=True, use_symbols=True,
+                         batch_size=BULK_BATCH):
+        """Yield lists of at most batch_size passwords until count have been generated"""
+        for start in range(0, count, batch_size):
+            yield self._generate_batch(
+                min(batch_size, count - start), length, use_uppercase, use_digits, use_symbols
+            )
+    
+    def generate_stream(self, count, length=12, use_uppercase=True, use_digits=True, use_symbols=True):
+        """Yield count passwords one at a time; memory stays flat whatever the count"""
+        for batch in self.generate_batches(count, length, use_uppercase, use_digits, use_symbols):
+            yield from batch
+    
+    def _generate_batch(self, count, length, use_uppercase, use_digits, use_symbols):
+        chars, required = self.character_sets(use_uppercase, use_digits, use_symbols)
+        width = max(length, len(required))
+        
+        # Column i < len(required) holds the guaranteed character of class i
+        codes = np.empty((count, width), dtype=np.uint8)
+        for i, charset in enumerate(required):
+            table = np.frombuffer(charset.encode('ascii'), dtype=np.uint8)
+            codes[:, i] = table[random_indices(len(table), count)]
+        table = np.frombuffer(chars.encode('ascii'), dtype=np.uint8)
+        fill = width - len(required)
+        codes[:, len(required):] = table[random_indices(len(table), count * fill)].reshape(count, fill)
+        
+        # Shuffle each row by sorting on random 64-bit keys
+        keys = np.frombuffer(os.urandom(8 * count * width), dtype=np.uint64).reshape(count, width)
+        codes = np.take_along_axis(codes, np.argsort(keys, axis=1), axis=1)
+        
+        text = codes.tobytes().decode('ascii')
+        return [text[i:i + width] for i in range(0, len(text), width)]
+    
     def generate_multiple(self, count=5, length=12):
         """Generate multiple password options"""
-        passwords = []
-        for _ in range(count):
-            passwords.append(self.generate_password(length))
-        return passwords
\ No newline at end of file
+        return self.generate_bulk(count, length)
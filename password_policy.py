@@ -0,0 +1,441 @@
+# password_policy.py
+"""Policy-driven password generation.
+
+A PasswordPolicy describes what every password must look like: minimum
+counts per character class, excluded characters, no repeated characters,
+or a fixed template such as "LLLL-DDDD-SSSS". compile() checks the policy
+once and returns a PolicySampler, which fills whole batches of passwords
+one position at a time from per-position masks of allowed characters, so
+every constraint holds by construction and nothing is regenerated.
+
+With min_score set, the sampler also never completes a repeat, sequence or
+keyboard walk (it uses the analyzer's own pair table), and compile() works
+out from the policy alone the lowest score any password it can produce
+would get. If that is below min_score the policy is rejected up front, so
+the analyzer never has to look at the generated passwords. The common-password
+penalty only counts when a built-in entry fits the slots; a corpus index holds
+hashes alone, so with one every length it covers counts as possibly common.
+
+With no_repeats, template literals must all differ and stay out of the slot
+pools (exclude them), or the policy is rejected.
+
+Template codes: l lowercase, u uppercase, L any letter, D digit, S symbol,
+A any allowed character. A backslash makes the next character literal, and
+every other character is literal.
+"""
+import os
+import string
+from itertools import combinations
+
+import numpy as np
+
+from keyboard_patterns import SECOND_SHIFT, DIGIT_SEQUENCES, LETTER_SEQUENCES, WALK_BITS
+from password_analyzer import PasswordAnalyzer, PAIR_STEPS, LENGTH_POINTS, VARIETY_POINTS, dictionary_penalty
+from password_generator import random_indices
+from password_scanner import SYMBOLS
+
+AMBIGUOUS = "0O1lI|"
+CLASSES = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'L': string.ascii_letters,
+    'D': string.digits,
+    'S': SYMBOLS,
+}
+ANY = 'A'
+CLASS_NAMES = ('lower', 'upper', 'digit', 'symbol')
+SEQUENCES = DIGIT_SEQUENCES | LETTER_SEQUENCES
+SAMPLE_BATCH = 16384
+TOO_CONSTRAINED = "Policy is too constrained to avoid weak patterns; relax min_score or the other constraints"
+
+
+def _char_class(ch):
+    for name, chars in zip(CLASS_NAMES, (string.ascii_lowercase, string.ascii_uppercase, string.digits, SYMBOLS)):
+        if ch in chars:
+            return name
+    return None
+
+
+class PasswordPolicy:
+    """Constraints every generated password must meet; compile() once, then sample many"""
+
+    def __init__(self, length=16, min_lower=1, min_upper=1, min_digits=1, min_symbols=1, template=None,
+                 exclude_ambiguous=False, exclude="", no_repeats=False, min_score=None):
+        self.length = length
+        self.min_lower = min_lower
+        self.min_upper = min_upper
+        self.min_digits = min_digits
+        self.min_symbols = min_symbols
+        self.template = template
+        self.exclude_ambiguous = exclude_ambiguous
+        self.exclude = exclude
+        self.no_repeats = no_repeats
+        self.min_score = min_score
+
+    def slots(self):
+        """Pool code or literal character for every slot, and whether slots are shuffled"""
+        if self.template is not None:
+            slots = []
+            chars = iter(self.template)
+            for ch in chars:
+                if ch == '\\':
+                    slots.append(('literal', next(chars, '\\')))
+                elif ch in CLASSES or ch == ANY:
+                    slots.append(('pool', ch))
+                else:
+                    slots.append(('literal', ch))
+            return slots, False
+
+        required = {'l': self.min_lower, 'u': self.min_upper, 'D': self.min_digits, 'S': self.min_symbols}
+        if sum(required.values()) > self.length:
+            raise ValueError(f"Minimum counts add up to more than the length ({self.length})")
+        slots = [('pool', code) for code, count in required.items() for _ in range(count)]
+        slots += [('pool', ANY)] * (self.length - len(slots))
+        return slots, True
+
+    def compile(self, analyzer=None):
+        if self.min_score is not None and analyzer is None:
+            analyzer = PasswordAnalyzer()
+        return PolicySampler(self, analyzer)
+
+
+class PolicySampler:
+    """A compiled PasswordPolicy"""
+
+    def __init__(self, policy, analyzer=None):
+        self.policy = policy
+        excluded = set(policy.exclude) | (set(AMBIGUOUS) if policy.exclude_ambiguous else set())
+        allowed = {code: ''.join(ch for ch in chars if ch not in excluded) for code, chars in CLASSES.items()}
+        allowed[ANY] = allowed['l'] + allowed['u'] + allowed['D'] + allowed['S']
+
+        slots, self.shuffle = policy.slots()
+        if not slots:
+            raise ValueError("Policy produces empty passwords")
+        self.length = len(slots)
+        literals = {ch for kind, ch in slots if kind == 'literal'}
+        if not all(' ' <= ch < '\x7f' for ch in literals):
+            raise ValueError("Template literals must be printable ASCII characters")
+        for kind, code in slots:
+            if kind == 'pool' and not allowed[code]:
+                raise ValueError(f"No characters left for '{code}' after exclusions")
+        if policy.no_repeats:
+            literal_chars = [ch for kind, ch in slots if kind == 'literal']
+            if len(literal_chars) != len(literals):
+                raise ValueError("Template repeats a literal character, which no_repeats forbids")
+            pooled = ''.join(allowed[code] for kind, code in slots if kind == 'pool')
+            shared = sorted(literals & set(pooled))
+            if shared:
+                raise ValueError(f"Template literals {''.join(shared)!r} can also fill a slot, "
+                                 f"which no_repeats forbids; exclude them from the slots")
+
+        # Alphabet of every character that can appear, and each pool as a mask over it
+        self.alphabet = np.array(sorted({ord(ch) for ch in ''.join(allowed.values())} | set(map(ord, literals))),
+                                 dtype=np.uint8)
+        index = {chr(code): i for i, code in enumerate(self.alphabet)}
+        self.pools = sorted({code for kind, code in slots if kind == 'pool'}, key=lambda code: len(allowed[code]))
+        self.pool_masks = np.zeros((len(self.pools), len(self.alphabet)), dtype=bool)
+        for p, code in enumerate(self.pools):
+            self.pool_masks[p, [index[ch] for ch in allowed[code]]] = True
+        # subsets[t, p]: pool t lies inside pool p (the pools form a laminar family)
+        self.subsets = (self.pool_masks[:, None, :] <= self.pool_masks[None, :, :]).all(axis=2)
+
+        # slot_pool[k] is the pool of slot k, or -1 with its character in slot_literal[k]
+        self.slot_pool = np.array([self.pools.index(c) if kind == 'pool' else -1 for kind, c in slots])
+        self.slot_literal = np.array([index[c] if kind == 'literal' else 0 for kind, c in slots])
+        self.literal_mask = np.zeros(len(self.alphabet), dtype=bool)
+        self.literal_mask[[index[ch] for ch in literals]] = True
+
+        self.no_repeats = policy.no_repeats
+        self.avoid_patterns = policy.min_score is not None
+        self.steps = PAIR_STEPS[np.ix_(self.alphabet, self.alphabet)]
+        self.lookahead = [self._lookahead(position) for position in range(self.length)]
+
+        self.worst_score = None
+        self.margins = np.zeros(len(self.pools), dtype=np.int64)
+        if self.avoid_patterns:
+            self._check_literal_patterns()
+            self.margins = self._pattern_margins()
+        if self.no_repeats:
+            self._check_distinct()
+        elif (self.pool_masks.sum(axis=1) <= self.margins).any():
+            raise ValueError(TOO_CONSTRAINED)
+        if self.avoid_patterns:
+            self.worst_score = self._worst_score(analyzer, allowed, slots)
+            if self.worst_score < policy.min_score:
+                raise ValueError(f"Policy cannot guarantee a score of {policy.min_score} "
+                                 f"(the weakest password it allows scores {self.worst_score})")
+
+    # Compile-time checks
+
+    def _free_pool_sizes(self):
+        return (self.pool_masks & ~self.literal_mask).sum(axis=1)
+
+    def _reserves(self, demand):
+        """Characters each pool must keep unused for the slots still to come.
+
+        This is Hall's condition for distinct characters, plus room for what
+        pattern avoidance may rule out at each of those slots. demand holds
+        the outstanding slots per pool (rows x pools).
+        """
+        reserves = np.zeros(demand.shape, dtype=np.int64)
+        for p in range(len(self.pools)):
+            reserves[:, p] = demand[:, p] + self.margins[p] * (demand[:, p] > 0) + reserves @ self.children[:, p]
+        return reserves
+
+    def _check_distinct(self):
+        """Without repeats, every pool holds enough distinct characters for its slots"""
+        # children[t, p]: t is a largest pool strictly inside p
+        strict = self.subsets & ~np.eye(len(self.pools), dtype=bool)
+        strict &= ~self.subsets.T | np.tri(len(self.pools), k=-1, dtype=bool).T
+        self.children = (strict & ~((strict.astype(int) @ strict.astype(int)) > 0)).astype(np.int64)
+
+        slots = np.bincount(self.slot_pool[self.slot_pool >= 0], minlength=len(self.pools))
+        demand = slots @ self.subsets.astype(np.int64)
+        sizes = self._free_pool_sizes()
+        for code, need, size in zip(self.pools, demand, sizes):
+            if need > size:
+                raise ValueError(f"Not enough distinct characters for '{code}' without repeats")
+        if (self._reserves(demand[None, :])[0] > sizes).any():
+            raise ValueError(TOO_CONSTRAINED)
+
+    def _check_literal_patterns(self):
+        """Patterns made only of template literals cannot be avoided"""
+        steps = self.steps
+        literal = [self.slot_literal[k] if self.slot_pool[k] < 0 else None for k in range(self.length)]
+        for k in range(self.length - 2):
+            a, b, c = literal[k:k + 3]
+            if a is None or b is None or c is None:
+                continue
+            weak = a == b == c or steps[a, b] & (steps[b, c] >> SECOND_SHIFT) & SEQUENCES
+            if k + 3 < self.length and literal[k + 3] is not None:
+                weak = weak or steps[a, b] & steps[b, c] & steps[c, literal[k + 3]] & WALK_BITS
+            if weak:
+                raise ValueError("Template literals form a weak pattern on their own")
+
+    def _pattern_margins(self):
+        """Most characters of each pool that pattern avoidance can rule out at one position.
+
+        Takes the worst case over every pair of earlier characters (with any
+        character before them) and the literals that follow.
+        """
+        size = len(self.alphabet)
+        every = np.arange(size)
+        pairs = (np.repeat(every, size), np.tile(every, size))  # every (p2, p1) combination
+        margins = np.zeros(len(self.pools), dtype=np.int64)
+        # Without a template only the first positions differ
+        positions = range(min(self.length, 4)) if self.shuffle else range(self.length)
+        for position in positions:
+            if self.shuffle:
+                candidates, previous = range(len(self.pools)), None
+            elif self.slot_pool[position] >= 0:
+                candidates = [self.slot_pool[position]]
+                previous = [self._slot_chars(k) if k >= 0 else None for k in (position - 2, position - 1)]
+            else:
+                continue
+
+            if position == 0:
+                rows, p2, p1 = 1, None, None
+            elif position == 1:
+                rows, p2, p1 = size, None, every
+            else:
+                rows, (p2, p1) = size * size, pairs
+            forbidden = self._forbidden(rows, None, p2, p1, self.lookahead[position], any_p3=position > 2)
+            if previous is not None and p1 is not None:
+                # Only characters the previous slots can hold matter
+                possible = previous[1][p1]
+                if p2 is not None:
+                    possible &= previous[0][p2]
+                forbidden = forbidden[possible]
+
+            for p in candidates:
+                worst = (forbidden & self.pool_masks[p]).sum(axis=1).max(initial=0)
+                margins[p] = max(margins[p], worst)
+        return margins
+
+    def _slot_chars(self, slot):
+        if self.slot_pool[slot] >= 0:
+            return self.pool_masks[self.slot_pool[slot]]
+        mask = np.zeros(len(self.alphabet), dtype=bool)
+        mask[self.slot_literal[slot]] = True
+        return mask
+
+    def _worst_score(self, analyzer, allowed, slots):
+        """Lowest score analyze_password can give any password this sampler produces"""
+        length = self.length
+        score = int(LENGTH_POINTS[min(length, 16)])
+
+        # The fewest character classes any password can show
+        slot_classes = [{_char_class(ch) for ch in (allowed[c] if kind == 'pool' else c)} - {None}
+                        for kind, c in slots]
+        variety = min(len(chosen) for size in range(5) for chosen in map(set, combinations(CLASS_NAMES, size))
+                      if all(classes & chosen for classes in slot_classes if classes)) if slot_classes else 0
+        score += int(VARIETY_POINTS[variety])
+
+        # The corpus index only holds hashes, so any length it covers may be common
+        slot_chars = [allowed[c] if kind == 'pool' else c for kind, c in slots]
+        if analyzer.common_index is not None and length <= analyzer.common_index.max_length:
+            score -= 30
+        elif any(self._can_produce(entry, slot_chars) for entry in analyzer.common_passwords
+                 if len(entry) == length):
+            score -= 30
+
+        if analyzer.dictionary is None:
+            if length > 4 and all(any(ch.isalpha() for ch in chars) for chars in slot_chars):
+                score -= 10
+        else:
+            coverable = sum(any(ch.lower() in analyzer.dictionary.symbols for ch in chars) for chars in slot_chars)
+            if coverable:
+                score -= int(dictionary_penalty(coverable, length))
+
+        if analyzer.breach_index is not None:
+            score -= 30
+        return max(0, min(100, score))
+
+    def _can_produce(self, lowered, slot_chars):
+        """Whether some password this sampler produces lowercases to lowered"""
+        options = [{ch.lower() for ch in chars} for chars in slot_chars]
+        if not self.shuffle:
+            return all(ch in option for ch, option in zip(lowered, options))
+
+        # Shuffled slots: match every character to a slot of its own (augmenting paths)
+        slot_owner = {}
+
+        def place(i, seen):
+            for slot, option in enumerate(options):
+                if lowered[i] in option and slot not in seen:
+                    seen.add(slot)
+                    if slot not in slot_owner or place(slot_owner[slot], seen):
+                        slot_owner[slot] = i
+                        return True
+            return False
+
+        return all(place(i, set()) for i in range(len(lowered)))
+
+    # Pattern avoidance
+
+    def _lookahead(self, position):
+        """Literal characters that directly follow a template position (up to three)"""
+        literals = []
+        if not self.shuffle:
+            for slot in range(position + 1, min(position + 4, self.length)):
+                if self.slot_pool[slot] >= 0:
+                    break
+                literals.append(self.slot_literal[slot])
+        return tuple(literals)
+
+    def _forbidden(self, rows, p3, p2, p1, lookahead, any_p3=False):
+        """Candidates that would complete a repeat, sequence or keyboard walk.
+
+        p3/p2/p1 hold each row's previous characters (None before the start;
+        any_p3 treats a missing p3 as any character). lookahead holds the
+        literals that follow the candidate.
+        """
+        steps = self.steps
+        forbidden = np.zeros((rows, len(self.alphabet)), dtype=bool)
+        if p1 is not None:
+            after = steps[p1]  # step from p1 to each candidate
+            if p2 is not None:
+                before = steps[p2, p1][:, None]
+                forbidden |= (before & (after >> SECOND_SHIFT) & SEQUENCES) != 0
+                if p3 is not None or any_p3:
+                    walk = before & steps[p3, p2][:, None] if p3 is not None else before
+                    forbidden |= (walk & after & WALK_BITS) != 0
+                forbidden[p1 == p2, p1[p1 == p2]] = True
+
+        if lookahead:
+            l1 = lookahead[0]
+            into = steps[:, l1][None, :]  # step from each candidate to the first literal
+            if p1 is not None:
+                forbidden |= (after & (into >> SECOND_SHIFT) & SEQUENCES) != 0
+                forbidden[p1 == l1, l1] = True
+                if p2 is not None:
+                    forbidden |= (before & after & into & WALK_BITS) != 0
+            if len(lookahead) > 1:
+                l2 = lookahead[1]
+                forbidden |= (into & (steps[l1, l2] >> SECOND_SHIFT) & SEQUENCES) != 0
+                if l1 == l2:
+                    forbidden[:, l1] = True
+                if p1 is not None:
+                    forbidden |= (after & into & steps[l1, l2] & WALK_BITS) != 0
+                if len(lookahead) > 2:
+                    forbidden |= (into & steps[l1, l2] & steps[l2, lookahead[2]] & WALK_BITS) != 0
+        return forbidden
+
+    # Sampling
+
+    def generate(self, count):
+        """count passwords as a list"""
+        return [password for batch in self.generate_batches(count) for password in batch]
+
+    def generate_batches(self, count, batch_size=SAMPLE_BATCH):
+        """Yield lists of at most batch_size passwords until count have been generated"""
+        for start in range(0, count, batch_size):
+            yield self._sample(min(batch_size, count - start))
+
+    def sample(self):
+        return self._sample(1)[0]
+
+    def _sample(self, rows):
+        length, size = self.length, len(self.alphabet)
+        row_index = np.arange(rows)
+        chosen = np.zeros((rows, length), dtype=np.intp)
+
+        # Which slot fills each position (shuffled per row without a template)
+        if self.shuffle:
+            keys = np.frombuffer(os.urandom(8 * rows * length), dtype=np.uint64).reshape(rows, length)
+            slot_of = np.argsort(keys, axis=1)
+        else:
+            slot_of = np.broadcast_to(np.arange(length), (rows, length))
+        position_pool = self.slot_pool[slot_of]
+
+        constrained = self.no_repeats or self.avoid_patterns
+        if self.no_repeats:
+            used = np.broadcast_to(self.literal_mask, (rows, size)).copy()
+            capacity = np.broadcast_to(self._free_pool_sizes(), (rows, len(self.pools))).copy()
+            remaining = np.zeros((rows, len(self.pools)), dtype=np.int64)
+            for p in range(len(self.pools)):
+                remaining[:, p] = (position_pool == p).sum(axis=1)
+
+        for position in range(length):
+            pool = position_pool[:, position]
+            if not self.shuffle and pool[0] < 0:
+                chosen[:, position] = self.slot_literal[position]
+                continue
+
+            if not constrained:
+                # Same pool for every row here: index straight into it
+                if self.shuffle:
+                    pick = np.empty(rows, dtype=np.intp)
+                    for p in range(len(self.pools)):
+                        rows_p = np.flatnonzero(pool == p)
+                        members = np.flatnonzero(self.pool_masks[p])
+                        pick[rows_p] = members[random_indices(len(members), len(rows_p))]
+                    chosen[:, position] = pick
+                else:
+                    members = np.flatnonzero(self.pool_masks[pool[0]])
+                    chosen[:, position] = members[random_indices(len(members), rows)]
+                continue
+
+            mask = self.pool_masks[pool].copy()
+            if self.no_repeats:
+                mask &= ~used
+                remaining[row_index, pool] -= 1
+                # Keep enough distinct characters for the slots still to come
+                tight = capacity - 1 < self._reserves(remaining @ self.subsets.astype(np.int64))
+                if tight.any():
+                    mask &= ~((tight.astype(np.int64) @ self.pool_masks.astype(np.int64)) > 0)
+            if self.avoid_patterns:
+                previous = [chosen[:, position - k] if position >= k else None for k in (3, 2, 1)]
+                mask &= ~self._forbidden(rows, *previous, self.lookahead[position])
+
+            # Uniform pick among each row's allowed characters (modulo bias below 2**-56)
+            allowed = mask.sum(axis=1)
+            rank = np.frombuffer(os.urandom(8 * rows), dtype=np.uint64) % allowed.astype(np.uint64)
+            pick = np.argmax(np.cumsum(mask, axis=1) > rank[:, None].astype(np.int64), axis=1)
+            chosen[:, position] = pick
+            if self.no_repeats:
+                used[row_index, pick] = True
+                capacity -= self.pool_masks[:, pick].T.astype(np.int64)
+
+        text = self.alphabet[chosen].tobytes().decode('ascii')
+        return [text[i:i + length] for i in range(0, len(text), length)]
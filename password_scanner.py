@@ -0,0 +1,162 @@
+# password_scanner.py
+"""Single-pass password scanner built on precomputed lookup tables."""
+import string
+from collections import namedtuple
+
+from keyboard_patterns import STEP_TABLE, SECOND_SHIFT, FIRST_BITS, DIGIT_SEQUENCES, LETTER_SEQUENCES, WALK_BITS
+
+SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+
+# Character class bits; NONALPHA marks characters whose lowercase form is not alphabetic
+LOWER, UPPER, DIGIT, SYMBOL, NONALPHA = 1, 2, 4, 8, 16
+
+# Step bit for a character equal to the one before it (newlines excepted, as '.'
+# never matches one); two such steps in a row are a run of three
+REPEAT = 1 << WALK_BITS.bit_length()
+
+PasswordSignals = namedtuple('PasswordSignals', [
+    'length', 'has_lower', 'has_upper', 'has_digit', 'has_symbol',
+    'repeats', 'sequential_numbers', 'sequential_letters', 'keyboard_walk', 'all_alpha', 'lowered'
+])
+
+
+def _build_ascii_table():
+    """Map every ASCII character to (class bits, key, {previous key: pattern bits}).
+
+    The incoming maps hold every key (None for the start and for characters
+    outside the patterns), so they can be indexed without a default.
+    """
+    keys = [None] + [chr(code) for code in range(128)]
+    incoming = {chr(code): dict.fromkeys(keys, 0) for code in range(128)}
+    for (a, b), bits in STEP_TABLE.items():
+        incoming[b][a] = bits
+
+    table = {}
+    for code in range(128):
+        ch = chr(code)
+        bits = 0
+        if ch in string.ascii_lowercase:
+            bits = LOWER
+        elif ch in string.ascii_uppercase:
+            bits = UPPER
+        elif ch in string.digits:
+            bits = DIGIT
+        elif ch in SYMBOLS:
+            bits = SYMBOL
+        if not ch.isalpha():
+            bits |= NONALPHA
+        table[ch] = (bits, ch, incoming[ch])
+    return table
+
+
+ASCII_TABLE = _build_ascii_table()
+NO_STEPS = dict.fromkeys(ASCII_TABLE[' '][2], 0)
+
+
+def classify(ch):
+    """(class bits, key, {previous key: pattern bits}) for any character.
+
+    Non-ASCII characters only count as digits (``\\d``), and the two that
+    lowercase to ASCII letters (KELVIN SIGN, I WITH DOT ABOVE) take part in
+    patterns as that letter, just like ``password.lower()`` would. A
+    multi-character lowercase form may end a pattern but never continue one.
+    """
+    entry = ASCII_TABLE.get(ch)
+    if entry is not None:
+        return entry
+    bits = DIGIT if ch.isdecimal() else 0
+    key, incoming = None, NO_STEPS
+    lowered = ch.lower()
+    if not lowered.isalpha():
+        bits |= NONALPHA
+    if lowered[0] in string.ascii_lowercase:
+        incoming = ASCII_TABLE[lowered[0]][2]
+        if len(lowered) == 1:
+            key = lowered
+    return bits, key, incoming
+
+
+class Transitions(dict):
+    """What can follow one character (prev, None at the start of a password):
+    next character -> (class bits, step bits, Transitions of the next character).
+
+    The step bits are the pattern bits of the pair plus REPEAT, so the scanner
+    classifies a character and finds every pattern step with one lookup. The
+    tables for ASCII characters are built once and shared; anything else is
+    worked out on sight and not kept, so unusual input cannot grow them.
+    """
+
+    def __init__(self, prev=None):
+        super().__init__()
+        self.prev = prev
+        self.key = None if prev is None else classify(prev)[1]
+
+    def __missing__(self, ch):
+        bits, _, incoming = classify(ch)
+        step = incoming[self.key]
+        if ch == self.prev and ch != '\n':
+            step |= REPEAT
+        following = ASCII_TRANSITIONS[ch] if ch in ASCII_TRANSITIONS else Transitions(ch)
+        return bits, step, following
+
+
+def _build_transitions():
+    """Fill START_TRANSITIONS and ASCII_TRANSITIONS for every ASCII pair"""
+    for transitions in (START_TRANSITIONS, *ASCII_TRANSITIONS.values()):
+        for ch in ASCII_TABLE:
+            entry = transitions.__missing__(ch)
+            # Steps outside every pattern share one entry per character
+            transitions[ch] = entry if entry[1] else PLAIN_ENTRIES[ch]
+
+
+ASCII_TRANSITIONS = {ch: Transitions(ch) for ch in ASCII_TABLE}
+START_TRANSITIONS = Transitions()
+PLAIN_ENTRIES = {ch: (bits, 0, ASCII_TRANSITIONS[ch]) for ch, (bits, _, _) in ASCII_TABLE.items()}
+_build_transitions()
+
+
+def pattern_steps(found):
+    """(repeats, sequential_numbers, sequential_letters, keyboard_walk) from accumulated step bits"""
+    return (bool(found & REPEAT), bool(found & DIGIT_SEQUENCES),
+            bool(found & LETTER_SEQUENCES), bool(found & WALK_BITS))
+
+
+class PasswordScanner:
+    """Collects every signal the analyzer scores in one walk over the password"""
+
+    def __init__(self):
+        self.transitions = START_TRANSITIONS
+
+    def scan(self, password):
+        """Walk the password once and return its PasswordSignals"""
+        state = self.transitions
+        mask = found = 0
+        prev_step = prev2_step = 0
+
+        for ch in password:
+            bits, step, state = state[ch]
+            mask |= bits
+
+            # Repeats and sequences end on two steps of one kind, walks on three in one direction
+            if step:
+                if prev_step:
+                    found |= prev_step & ((step >> SECOND_SHIFT) & FIRST_BITS | step & REPEAT
+                                          | prev2_step & step & WALK_BITS)
+                prev2_step = prev_step
+                prev_step = step
+            else:
+                prev_step = 0
+
+        return PasswordSignals(
+            length=len(password),
+            has_lower=bool(mask & LOWER),
+            has_upper=bool(mask & UPPER),
+            has_digit=bool(mask & DIGIT),
+            has_symbol=bool(mask & SYMBOL),
+            repeats=bool(found & REPEAT),
+            sequential_numbers=bool(found & DIGIT_SEQUENCES),
+            sequential_letters=bool(found & LETTER_SEQUENCES),
+            keyboard_walk=bool(found & WALK_BITS),
+            all_alpha=bool(password) and not mask & NONALPHA,
+            lowered=password.lower()
+        )
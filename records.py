@@ -0,0 +1,67 @@
+# records.py
+"""Immutable results returned by PasswordService.
+
+Service methods copy what callers need out of the session into these
+records before it closes. Unlike detached ORM objects they never lazy-load,
+cannot be changed by one caller under another and are safe to share between
+threads. Attribute names match the models they come from.
+"""
+from collections import namedtuple
+
+from models import STRONG_SCORE
+
+
+class UserRecord(namedtuple('UserRecord', [
+        'id', 'username', 'test_count', 'generation_count', 'breach_count', 'average_score'])):
+    """A user and its summary counters (query with undefer_group('stats') to load them at once)"""
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.test_count, user.generation_count,
+                   user.breach_count, user.average_score)
+
+
+class TestRecord(namedtuple('TestRecord', ['id', 'user_id', 'score', 'is_generated', 'breach_ids'])):
+    """A password test; breach_ids is None from listings that do not load breaches"""
+    __slots__ = ()
+
+    @classmethod
+    def from_test(cls, test, breaches=False):
+        breach_ids = tuple(breach.id for breach in test.breaches) if breaches else None
+        return cls(test.id, test.user_id, test.score, test.is_generated, breach_ids)
+
+    @classmethod
+    def with_breaches(cls, test):
+        return cls.from_test(test, breaches=True)
+
+    @property
+    def is_strong(self):
+        return self.score >= STRONG_SCORE
+
+    @property
+    def strength_category(self):
+        return "Strong" if self.is_strong else "Weak"
+
+    @property
+    def breach_count(self):
+        return None if self.breach_ids is None else len(self.breach_ids)
+
+
+class BreachRecord(namedtuple('BreachRecord', [
+        'id', 'user_id', 'breach_name', 'severity', 'affected_password_ids'])):
+    """A breach; affected_password_ids is None where affected passwords are not loaded"""
+    __slots__ = ()
+
+    @classmethod
+    def from_breach(cls, breach, affected=True):
+        affected_ids = tuple(test.id for test in breach.affected_passwords) if affected else None
+        return cls(breach.id, breach.user_id, breach.breach_name, breach.severity, affected_ids)
+
+    @property
+    def affected_password_count(self):
+        return None if self.affected_password_ids is None else len(self.affected_password_ids)
+
+    @property
+    def severity_level(self):
+        return 2 if self.severity == "High" else 1
@@ -0,0 +1,62 @@
+# user_cache.py
+"""Process-wide username -> user id cache.
+
+Most service calls only need the id of the user they act for, so it is
+looked up once per process and reused. ORM inserts, deletes and renames of
+User rows drop the affected entries through mapper events.
+
+Changes made by other processes are not seen. User ids are never reused
+(the users table is AUTOINCREMENT), so a stale entry cannot point at a
+different user, but it can outlive its user: reads then find no rows, as
+if the user had no tests or breaches, and writes (tests, generations,
+breaches, summary counters) succeed as orphan rows under the deleted id,
+since SQLite foreign keys are not enforced. A user renamed elsewhere keeps
+resolving under the old name until this process restarts or invalidates it.
+"""
+import threading
+
+from sqlalchemy import event, inspect
+
+from models import User
+
+
+class UserIdCache:
+    """Thread-safe map of username to user id"""
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        return self._ids.get(username)
+
+    def set(self, username, user_id):
+        with self._lock:
+            self._ids[username] = user_id
+
+    def invalidate(self, username=None):
+        """Forget one username, or every entry when none is given"""
+        with self._lock:
+            if username is None:
+                self._ids.clear()
+            else:
+                self._ids.pop(username, None)
+
+    def __len__(self):
+        return len(self._ids)
+
+
+USER_IDS = UserIdCache()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_delete')
+def _forget_user(mapper, connection, user):
+    USER_IDS.invalidate(user.username)
+
+
+@event.listens_for(User, 'after_update')
+def _forget_renamed_user(mapper, connection, user):
+    history = inspect(user).attrs.username.history
+    for username in (*history.added, *history.deleted):
+        USER_IDS.invalidate(username)
@@ -0,0 +1,96 @@
+# user_summary.py
+"""Maintenance of the user_summary table.
+
+Every PasswordService write that adds tests or breaches also adds the same
+amounts to the user's summary row, in the same transaction, so dashboards
+read one row per user instead of scanning password_tests. rebuild_summary()
+recomputes every row from the base tables and reports any drift it finds.
+"""
+from collections import namedtuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from models import Breach, PasswordTest, User, UserSummary, STRONG_SCORE
+
+COUNTERS = ('test_count', 'generated_count', 'score_sum', 'strong_count', 'breach_count')
+
+SummaryDrift = namedtuple('SummaryDrift', ['user_id', 'counter', 'stored', 'actual'])
+
+
+def add_to_summary(session, user_id, tests=0, generated=0, score_sum=0, strong=0, breaches=0):
+    """Add to a user's counters, creating the row on first use (flushed with the session's transaction)"""
+    values = dict(zip(COUNTERS, (tests, generated, score_sum, strong, breaches)))
+    statement = insert(UserSummary).values(user_id=user_id, **values)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[UserSummary.user_id],
+        set_={name: getattr(UserSummary, name) + statement.excluded[name] for name in COUNTERS}
+    ))
+
+
+def add_tests_to_summary(session, tests):
+    """Add (user_id, score, is_generated) rows to their users' counters, one statement per user"""
+    totals = {}
+    for user_id, score, is_generated in tests:
+        counts = totals.setdefault(user_id, [0, 0, 0, 0])
+        counts[1 if is_generated else 0] += 1
+        counts[2] += score
+        counts[3] += score >= STRONG_SCORE
+    for user_id, (tested, generated, score_sum, strong) in totals.items():
+        add_to_summary(session, user_id, tested, generated, score_sum, strong)
+
+
+def _actual_counters(session):
+    """Every user's counters recomputed from password_tests and breaches"""
+    actual = {user_id: [0] * len(COUNTERS) for (user_id,) in session.query(User.id)}
+    tests = session.query(
+        PasswordTest.user_id,
+        func.count(PasswordTest.id).filter(PasswordTest.is_generated == False),
+        func.count(PasswordTest.id).filter(PasswordTest.is_generated == True),
+        func.coalesce(func.sum(PasswordTest.score), 0),
+        func.count(PasswordTest.id).filter(PasswordTest.is_strong)
+    ).group_by(PasswordTest.user_id)
+    for user_id, *counts in tests:
+        if user_id in actual:
+            actual[user_id][:4] = counts
+    for user_id, breaches in session.query(Breach.user_id, func.count(Breach.id)).group_by(Breach.user_id):
+        if user_id in actual:
+            actual[user_id][4] = breaches
+    return actual
+
+
+def _stored_counters(session):
+    return {row.user_id: [getattr(row, name) for name in COUNTERS] for row in session.query(UserSummary)}
+
+
+def _drift(stored, actual):
+    drift = []
+    zeros = [0] * len(COUNTERS)
+    for user_id in sorted(actual.keys() | stored.keys()):
+        if user_id not in actual:
+            drift.append(SummaryDrift(user_id, 'row', 'orphaned', None))
+            continue
+        if user_id not in stored:
+            drift.append(SummaryDrift(user_id, 'row', None, 'missing'))
+        for name, value, expected in zip(COUNTERS, stored.get(user_id, zeros), actual[user_id]):
+            if value != expected:
+                drift.append(SummaryDrift(user_id, name, value, expected))
+    return drift
+
+
+def verify_summary(session):
+    """List every difference between the stored summary and the base tables"""
+    return _drift(_stored_counters(session), _actual_counters(session))
+
+
+def rebuild_summary(session):
+    """Recompute every summary row from the base tables in one transaction; returns the drift found"""
+    stored = _stored_counters(session)
+    # Deleting first takes SQLite's write lock, so no write lands between the recount and the insert
+    session.query(UserSummary).delete(synchronize_session=False)
+    actual = _actual_counters(session)
+    session.bulk_insert_mappings(UserSummary, [
+        {'user_id': user_id, **dict(zip(COUNTERS, counts))} for user_id, counts in actual.items()
+    ])
+    session.commit()
+    return _drift(stored, actual)
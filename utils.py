@@ -3,6 +3,9 @@ import time
 import sys
 import threading
 
+# Seconds with_loading keeps the spinner up after the work finishes
+LOADING_PAUSE = 0.5
+
 class ASCIILoader:
     def __init__(self, message="Loading"):
         self.message = message
@@ -33,11 +36,14 @@ class ASCIILoader:
 def with_loading(message="Processing"):
     def decorator(func):
         def wrapper(*args, **kwargs):
+            # Only the interactive (main) thread animates; worker threads just run the call
+            if threading.current_thread() is not threading.main_thread():
+                return func(*args, **kwargs)
             loader = ASCIILoader(message)
             loader.start()
             try:
                 result = func(*args, **kwargs)
-                time.sleep(0.5)  # Brief pause for visual effect
+                time.sleep(LOADING_PAUSE)  # Brief pause for visual effect
                 return result
             finally:
                 loader.stop()
@@ -0,0 +1,193 @@
+# write_behind.py
+"""Write-behind recording of PasswordTest rows.
+
+WriteBehindRecorder queues inserts and a background thread writes them in
+group commits: one transaction (and one fsync) per batch of up to
+max_batch rows, started as soon as a batch fills or max_delay seconds after
+the oldest queued row. flush() blocks until everything queued so far is
+committed; close(), also run at interpreter exit, flushes and stops the
+thread.
+
+Each batch is one executemany INSERT plus one user_summary update per user
+in it. Rows get consecutive ids inside the transaction (SQLite holds the
+write lock throughout), so the ids are read back from last_insert_rowid()
+rather than row by row.
+"""
+import atexit
+import threading
+import time
+
+from sqlalchemy import insert, text
+
+from database import SessionLocal
+from models import PasswordTest
+from user_summary import add_tests_to_summary
+
+
+class PendingTest:
+    """A queued PasswordTest; id is filled in once its batch commits, error if it fails"""
+
+    __slots__ = ('user_id', 'score', 'is_generated', 'id', 'error', '_sequence', '_recorder')
+
+    def __init__(self, user_id, score, is_generated, sequence, recorder):
+        self.user_id = user_id
+        self.score = score
+        self.is_generated = is_generated
+        self.id = None
+        self.error = None
+        self._sequence = sequence
+        self._recorder = recorder
+
+    def wait(self):
+        """Block until this row is committed and return its id; raises its batch's error if that failed"""
+        return self._recorder.wait(self)
+
+
+class WriteBehindRecorder:
+    """Queue of PasswordTest inserts flushed by a background thread in group commits"""
+
+    def __init__(self, max_batch=1000, max_delay=0.05, session_factory=SessionLocal):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.session_factory = session_factory
+        self.committed = 0  # rows written so far
+        self.batches = 0  # group commits so far
+
+        self._queue = []
+        self._queued = 0  # sequence number of the last queued row
+        self._done = 0  # sequence number of the last committed (or failed) row
+        self._oldest = None  # when the oldest queued row arrived
+        self._flush_requested = False
+        self._closed = False
+        self._error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._finished = threading.Condition(self._lock)
+
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, user_id, score, is_generated=False):
+        """Queue one PasswordTest insert and return its PendingTest"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write-behind recorder is closed")
+            self._queued += 1
+            test = PendingTest(user_id, score, is_generated, self._queued, self)
+            self._queue.append(test)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._queue) >= self.max_batch or len(self._queue) == 1:
+                self._wake.notify()
+            return test
+
+    def flush(self):
+        """Block until every row queued before this call is committed.
+
+        Raises the error of any batch that failed since the last flush.
+        """
+        with self._lock:
+            target = self._queued
+            self._flush_requested = True
+            self._wake.notify()
+            while self._done < target:
+                self._finished.wait()
+            self._raise_error()
+
+    def wait(self, test):
+        """Block until test's batch is written and return its id.
+
+        Raises the error of test's own batch if it failed; failures of other
+        batches are left for flush().
+        """
+        with self._lock:
+            self._flush_requested = True
+            self._wake.notify()
+            while self._done < test._sequence:
+                self._finished.wait()
+        if test.error is not None:
+            raise test.error
+        return test.id
+
+    def close(self):
+        """Flush everything still queued and stop the background thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        atexit.unregister(self.close)
+        with self._lock:
+            self._raise_error()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._queue)
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _next_batch(self):
+        """Wait until a batch is due and take it off the queue (None once closed and drained)"""
+        with self._lock:
+            while True:
+                if self._queue:
+                    due = (len(self._queue) >= self.max_batch or self._flush_requested or self._closed
+                           or time.monotonic() - self._oldest >= self.max_delay)
+                    if due:
+                        break
+                    self._wake.wait(self.max_delay - (time.monotonic() - self._oldest))
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._wake.wait()
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            self._oldest = time.monotonic() if self._queue else None
+            if not self._queue:
+                self._flush_requested = False
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            error = None
+            try:
+                self._write(batch)
+            except Exception as e:
+                error = e
+            with self._lock:
+                if error is not None:
+                    self._error = error
+                    for test in batch:
+                        test.error = error
+                else:
+                    self.committed += len(batch)
+                    self.batches += 1
+                self._done = batch[-1]._sequence
+                self._finished.notify_all()
+
+    def _write(self, batch):
+        session = self.session_factory()
+        try:
+            session.execute(insert(PasswordTest), [
+                {'user_id': test.user_id, 'score': test.score, 'is_generated': test.is_generated}
+                for test in batch
+            ])
+            last_id = session.execute(text("SELECT last_insert_rowid()")).scalar()
+            add_tests_to_summary(session, ((test.user_id, test.score, test.is_generated) for test in batch))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        for offset, test in enumerate(batch):
+            test.id = last_id - len(batch) + 1 + offset